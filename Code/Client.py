@@ -1,3 +1,4 @@
+import ast
 import socket
 import re 
 
@@ -12,7 +13,7 @@ une partie du protocole SMTP (Simple Mail Transfer Protocol - RFC 5321).
 FONCTIONNALITÉS (VERSION 3.0) :
     Connexion à un serveur SMTP sur le port 65434
     Envoi de commandes SMTP :
-      EHLO      : Identification du client (test - non implémenté sur le serveur).
+      EHLO      : Identification du client (le serveur annonce ses extensions).
       HELO      : Identification du client.
       MAIL FROM : Identification de l'expéditeur.
       RCPT TO   : Identification du destinataire.
@@ -24,6 +25,10 @@ FONCTIONNALITÉS (VERSION 3.0) :
        - STAT : permet d'obtenir le nombre de messages et la taille totale.
        - LIST : permet d'obtenir la liste des messages avec leur taille.
        - RETR n : permet de récupérer le message n.
+       - SEARCH mots : permet de rechercher les messages contenant des mots (extension).
+
+    Pour un usage applicatif (pool de connexions, asyncio, pipelining),
+    voir la bibliothèque client_messagerie.py.
 """
 
 # Configuration
@@ -58,8 +63,8 @@ def gestion_commande_list(retour):
     contenu = retour[4:].strip()  
     
     try:
-        # Évalue la chaîne comme une liste 
-        liste_messages = eval(contenu)
+        # Évalue la chaîne comme une liste (littéraux uniquement)
+        liste_messages = ast.literal_eval(contenu)
         
         if liste_messages:
             print("\n=== Liste des messages ===")
@@ -104,6 +109,18 @@ def gestion_commande_retr(retour):
     print(contenu)
     print()
 
+def gestion_commande_search(retour):
+    if verification_retour(retour):
+        print(f"{retour}\n")
+        return
+    
+    # Enlève le préfixe "+OK " et affiche les ID trouvés
+    contenu = retour[4:].strip()
+    if contenu == "[]":
+        print("\nAucun message ne correspond à la recherche.\n")
+    else:
+        print(f"\nMessages correspondants (ID) : {contenu.strip('[]')}\n")
+
 def choix_send():
     expediteur = input("Expéditeur: ")
     while not valider_email(expediteur):
@@ -133,7 +150,7 @@ def traiter_commande_send(client, expediteur, destinataire, message):
 
 
 def traiter_commande_pop3(client_pop3, choixcommandepop3, choixmailpop3):
-    """Traite une commande POP3 (STAT, LIST, RETR)"""
+    """Traite une commande POP3 (STAT, LIST, RETR, SEARCH)"""
     if choixcommandepop3 == "stat":
         retour = envoyer_commande(client_pop3, "STAT " + choixmailpop3)
         gestion_commande_stat(retour)
@@ -149,8 +166,16 @@ def traiter_commande_pop3(client_pop3, choixcommandepop3, choixmailpop3):
             gestion_commande_retr(retour)
         else:
             print("\nUsage incorrect de RETR. Format: retr n\n")
+
+    elif choixcommandepop3.split()[0] == "search":
+        partspop3 = choixcommandepop3.split()
+        if len(partspop3) >= 2:
+            retour = envoyer_commande(client_pop3, f"SEARCH {' '.join(partspop3[1:])} {choixmailpop3}")
+            gestion_commande_search(retour)
+        else:
+            print("\nUsage incorrect de SEARCH. Format: search mot [mot ...]\n")
     else:
-        print("Commande non reconnue. Tapez 'stat', 'list', 'retr n' ou 'back'.\n")
+        print("Commande non reconnue. Tapez 'stat', 'list', 'retr n', 'search mots' ou 'back'.\n")
 
 
 def session_pop3(choixmailpop3):
@@ -169,6 +194,7 @@ def session_pop3(choixmailpop3):
             choixcommandepop3 = input("Veuillez choisir l'une des commandes suivantes : \n- 'stat' pour obtenir le nombre de messages et la taille totale \n" \
             "- 'list' pour obtenir la liste des messages avec leur taille\n" \
             "- 'retr n' pour récupérer le message d'indice n\n" \
+            "- 'search mots' pour rechercher les messages contenant ces mots\n" \
             "- 'back' pour revenir au menu SMTP : ").strip().lower()
 
             if choixcommandepop3 == "back":
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+from stockage import StockageMessage
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Banc d'essai de la couche de stockage.
+Compare le format texte actuel et les formats compressés (zlib, lzma) :
+    - débit d'écriture (sauvegarder_message)
+    - débit de lecture (charger_boite_mail)
+    - empreinte disque de la boîte mail
+
+Usage : python benchmark_stockage.py
+"""
+
+# Configuration
+NB_MESSAGES = 2000
+NB_LECTURES = 5
+SEUIL_COMPRESSION = 512
+DESTINATAIRE = 'bob@example.com'
+EXPEDITEUR = 'alice@example.com'
+
+def generer_corps(indice):
+    """Génère un corps de message réaliste (texte répétitif, ~2 Ko)"""
+    lignes = [f"Bonjour Bob, ceci est le message numéro {indice}."]
+    for j in range(30):
+        lignes.append(f"Ligne {j} : compte rendu de la réunion du projet de messagerie, point {j % 7}.")
+    lignes.append("Cordialement, Alice")
+    return lignes
+
+def mesurer(compression):
+    """Retourne (débit écriture, débit lecture, taille disque) pour un format"""
+    with tempfile.TemporaryDirectory() as dossier:
+        stockage = StockageMessage(dossier, compression=compression,
+                                   seuil_compression=SEUIL_COMPRESSION)
+        corps = [generer_corps(i) for i in range(NB_MESSAGES)]
+
+        # Écriture (les messages de log du stockage sont masqués)
+        debut = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for lignes in corps:
+                stockage.sauvegarder_message(EXPEDITEUR, DESTINATAIRE, lignes)
+        duree_ecriture = time.perf_counter() - debut
+
+        # Lecture complète de la boîte mail
+        debut = time.perf_counter()
+        for _ in range(NB_LECTURES):
+            boite_mail = stockage.charger_boite_mail(DESTINATAIRE)
+        duree_lecture = (time.perf_counter() - debut) / NB_LECTURES
+
+        assert stockage.obtenir_nombre_messages(boite_mail) == NB_MESSAGES
+        taille_disque = os.path.getsize(stockage._chemin_boite_mail(DESTINATAIRE))
+
+        return NB_MESSAGES / duree_ecriture, NB_MESSAGES / duree_lecture, taille_disque
+
+def main():
+    print(f"=== Banc d'essai du stockage ({NB_MESSAGES} messages) ===\n")
+    print(f"{'Format':<10} | {'Écriture (msg/s)':<18} | {'Lecture (msg/s)':<18} | {'Disque (octets)':<16} | {'Ratio':<6}")
+    print("-" * 80)
+
+    taille_reference = None
+    for compression in (None, 'zlib', 'lzma'):
+        ecriture, lecture, taille = mesurer(compression)
+        if taille_reference is None:
+            taille_reference = taille
+        nom = compression or 'texte'
+        print(f"{nom:<10} | {ecriture:<18.0f} | {lecture:<18.0f} | {taille:<16} | {taille / taille_reference:<6.2f}")
+    print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,766 @@
+import ast
+import asyncio
+import collections
+import contextlib
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Bibliothèque cliente réutilisable pour les serveurs SMTP et POP3 du projet.
+Contrairement au client interactif (Client.py), elle est destinée à être
+importée par des applications qui envoient et consultent du courrier en volume.
+
+FONCTIONNALITÉS :
+    - Clients synchrones (ClientSMTP, ClientPOP3) et asyncio (ClientSMTPAsync, ClientPOP3Async)
+    - Lecture des réponses jusqu'au CRLF final, réponses SMTP multi-lignes ("250-")
+      et réponses POP3 terminées par un point (CAPA)
+    - Pipelining lorsque le serveur l'annonce (EHLO / CAPA)
+    - Pools de connexions (PoolConnexions, PoolConnexionsAsync)
+    - Récupération concurrente de messages (recuperer_messages, recuperer_messages_async)
+    - Avis de nouveau message poussés par le serveur (ClientNotifications, ClientNotificationsAsync)
+
+EXEMPLE :
+    pool = PoolConnexions(lambda: ClientPOP3('localhost', 65433), taille_max=4)
+    messages = recuperer_messages(pool, 'bob@example.com', [1, 2, 3])
+"""
+
+# Configuration par défaut
+HOTE = 'localhost'
+PORT_SMTP = 65434
+PORT_POP3 = 65433
+PORT_NOTIFICATIONS = 65436
+DELAI = 10.0  # Délai d'attente réseau (secondes)
+
+class ErreurMessagerie(Exception):
+    """Réponse d'erreur du serveur (code SMTP 4xx/5xx ou -ERR POP3)"""
+
+    def __init__(self, reponse):
+        super().__init__(reponse)
+        self.reponse = reponse
+
+# ─── Fonctions communes aux versions synchrone et asyncio ───────────────────
+
+def formater_commande(commande):
+    """Encode une commande terminée par CRLF"""
+    return f"{commande}\r\n".encode('utf-8')
+
+def formater_donnees(lignes):
+    """Encode le corps d'un message pour DATA (transparence des points, '.' final)"""
+    lignes = [f".{ligne}" if ligne.startswith(".") else ligne for ligne in lignes]
+    return "".join(f"{ligne}\r\n" for ligne in lignes + ["."]).encode('utf-8')
+
+def verifier_smtp(code, lignes, attendu):
+    """Lève ErreurMessagerie si le code SMTP n'est pas celui attendu"""
+    if code != attendu:
+        raise ErreurMessagerie(f"{code} {' '.join(lignes)}")
+    return lignes
+
+def verifier_pop3(reponse):
+    """Retourne le texte suivant '+OK', ou lève ErreurMessagerie"""
+    if not reponse.startswith("+OK"):
+        raise ErreurMessagerie(reponse)
+    return reponse[3:].strip()
+
+def analyser_ligne_smtp(ligne):
+    """Découpe une ligne de réponse SMTP en (code, texte, dernière ligne ?)"""
+    return ligne[:3], ligne[4:], ligne[3:4] != "-"
+
+def analyser_stat(texte):
+    """'2 78' -> (2, 78)"""
+    nombre, taille = texte.split()[:2]
+    return int(nombre), int(taille)
+
+def analyser_liste(texte):
+    """Évalue sans risque une liste renvoyée par LIST ou SEARCH"""
+    return ast.literal_eval(texte)
+
+def analyser_avis(ligne):
+    """'* NEW bob@example.com 3' -> ('bob@example.com', 3) ; nombre None s'il est absent"""
+    parties = ligne.split()
+    nombre = int(parties[3]) if len(parties) > 3 else None
+    return parties[2], nombre
+
+# ─── Clients synchrones ─────────────────────────────────────────────────────
+
+class _ConnexionTexte:
+    """Socket avec tampon de lecture : lit des réponses terminées par CRLF"""
+
+    def __init__(self, hote, port, delai):
+        self.socket = socket.create_connection((hote, port), timeout=delai)
+        self.tampon = b""
+
+    def envoyer(self, donnees):
+        self.socket.sendall(donnees)
+
+    def lire_ligne(self):
+        """Retourne la prochaine réponse (elle peut contenir des '\\n' isolés)"""
+        while b"\r\n" not in self.tampon:
+            donnees = self.socket.recv(4096)
+            if not donnees:
+                raise ConnectionError("Connexion fermée par le serveur")
+            self.tampon += donnees
+        ligne, self.tampon = self.tampon.split(b"\r\n", 1)
+        return ligne.decode('utf-8')
+
+    def fermer(self):
+        try:
+            self.socket.close()
+        except OSError:
+            pass
+
+class ClientSMTP:
+    """Client SMTP synchrone"""
+
+    def __init__(self, hote=HOTE, port=PORT_SMTP, delai=DELAI):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+        self.connexion = None
+        self.capacites = set()
+
+    def connecter(self):
+        """Ouvre la connexion et s'identifie (EHLO, ou HELO si EHLO est refusé)"""
+        self.connexion = _ConnexionTexte(self.hote, self.port, self.delai)
+        verifier_smtp(*self._lire_reponse(), "220")
+
+        self.connexion.envoyer(formater_commande("EHLO localhost"))
+        code, lignes = self._lire_reponse()
+        if code == "250":
+            self.capacites = {ligne.split()[0].upper() for ligne in lignes[1:] if ligne}
+        else:
+            self._commande("HELO localhost", "250")
+        return self
+
+    def _lire_reponse(self):
+        """Lit une réponse SMTP, éventuellement multi-lignes : (code, [textes])"""
+        lignes = []
+        while True:
+            code, texte, derniere = analyser_ligne_smtp(self.connexion.lire_ligne())
+            lignes.append(texte)
+            if derniere:
+                return code, lignes
+
+    def _commande(self, commande, attendu):
+        self.connexion.envoyer(formater_commande(commande))
+        return verifier_smtp(*self._lire_reponse(), attendu)
+
+    def envoyer(self, expediteur, destinataire, lignes):
+        """
+        Envoie un message
+
+        Args:
+            expediteur (str): Adresse de l'expéditeur
+            destinataire (str): Adresse du destinataire
+            lignes (list): Lignes du corps du message
+        """
+        try:
+            self._transaction(expediteur, destinataire, lignes)
+        except ErreurMessagerie:
+            # Transaction refusée : RSET la clôt pour que la connexion reste réutilisable
+            self.connexion.envoyer(formater_commande("RSET"))
+            self._lire_reponse()
+            raise
+
+    def _transaction(self, expediteur, destinataire, lignes):
+        enveloppe = [(f"MAIL FROM:<{expediteur}>", "250"),
+                     (f"RCPT TO:<{destinataire}>", "250"),
+                     ("DATA", "354")]
+
+        if "PIPELINING" in self.capacites:
+            # Les trois commandes partent ensemble, les réponses sont lues ensuite
+            self.connexion.envoyer(b"".join(formater_commande(c) for c, _ in enveloppe))
+            reponses = [self._lire_reponse() for _ in enveloppe]
+            if reponses[-1][0] == "354" and any(code != attendu for (code, _), (_, attendu)
+                                                in zip(reponses, enveloppe)):
+                # DATA accepté malgré une erreur d'enveloppe : message vide pour resynchroniser
+                self.connexion.envoyer(formater_donnees([]))
+                self._lire_reponse()
+            for (code, textes), (_, attendu) in zip(reponses, enveloppe):
+                verifier_smtp(code, textes, attendu)
+        else:
+            for commande, attendu in enveloppe:
+                self._commande(commande, attendu)
+
+        self.connexion.envoyer(formater_donnees(list(lignes)))
+        verifier_smtp(*self._lire_reponse(), "250")
+
+    def fermer(self):
+        """Envoie QUIT puis ferme la connexion"""
+        if self.connexion is None:
+            return
+        try:
+            with contextlib.suppress(Exception):
+                self._commande("QUIT", "221")
+        finally:
+            self.connexion.fermer()
+            self.connexion = None
+
+    def __enter__(self):
+        return self.connecter()
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+class ClientPOP3:
+    """Client POP3 synchrone"""
+
+    def __init__(self, hote=HOTE, port=PORT_POP3, delai=DELAI):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+        self.connexion = None
+        self.capacites = set()
+
+    def connecter(self):
+        """Ouvre la connexion et interroge les capacités du serveur (CAPA)"""
+        self.connexion = _ConnexionTexte(self.hote, self.port, self.delai)
+        verifier_pop3(self.connexion.lire_ligne())
+
+        self.connexion.envoyer(formater_commande("CAPA"))
+        if self.connexion.lire_ligne().startswith("+OK"):
+            self.capacites = set(self._lire_multiligne())
+        return self
+
+    def _lire_multiligne(self):
+        """Lit les lignes d'une réponse multi-lignes jusqu'au point final"""
+        lignes = []
+        while (ligne := self.connexion.lire_ligne()) != ".":
+            lignes.append(ligne[1:] if ligne.startswith("..") else ligne)
+        return lignes
+
+    def _commande(self, commande):
+        self.connexion.envoyer(formater_commande(commande))
+        return verifier_pop3(self.connexion.lire_ligne())
+
+    def stat(self, adresse):
+        """Retourne (nombre de messages, taille totale)"""
+        return analyser_stat(self._commande(f"STAT {adresse}"))
+
+    def lister(self, adresse):
+        """Retourne la liste [[id, expéditeur, taille], ...]"""
+        return analyser_liste(self._commande(f"LIST {adresse}"))
+
+    def recuperer(self, adresse, id_msg):
+        """Retourne le contenu d'un message"""
+        return self._commande(f"RETR {id_msg} {adresse}")
+
+    def supprimer(self, adresse, id_msg):
+        """Supprime un message (les messages suivants sont renumérotés)"""
+        self._commande(f"DELE {id_msg} {adresse}")
+
+    def rechercher(self, adresse, termes):
+        """Retourne les ID des messages contenant tous les termes (extension SEARCH)"""
+        return analyser_liste(self._commande(f"SEARCH {' '.join(termes)} {adresse}"))
+
+    def recuperer_plusieurs(self, adresse, ids):
+        """
+        Récupère plusieurs messages, en pipelining si le serveur l'annonce
+
+        Returns:
+            dict: {id: contenu}
+        """
+        ids = list(ids)
+        if "PIPELINING" not in self.capacites:
+            return {id_msg: self.recuperer(adresse, id_msg) for id_msg in ids}
+
+        self.connexion.envoyer(b"".join(formater_commande(f"RETR {id_msg} {adresse}") for id_msg in ids))
+        # Toutes les réponses sont lues avant de signaler une erreur (connexion réutilisable)
+        reponses = [self.connexion.lire_ligne() for _ in ids]
+        return {id_msg: verifier_pop3(reponse) for id_msg, reponse in zip(ids, reponses)}
+
+    def fermer(self):
+        """Envoie QUIT puis ferme la connexion"""
+        if self.connexion is None:
+            return
+        try:
+            with contextlib.suppress(Exception):
+                self._commande("QUIT")
+        finally:
+            self.connexion.fermer()
+            self.connexion = None
+
+    def __enter__(self):
+        return self.connecter()
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+class PoolConnexions:
+    """
+    Pool de connexions synchrones, partageable entre threads
+
+    Args:
+        fabrique: Fonction sans argument créant un client non connecté
+        taille_max (int): Nombre maximal de connexions ouvertes
+    """
+
+    def __init__(self, fabrique, taille_max=8):
+        self.fabrique = fabrique
+        self.taille_max = taille_max
+        self.libres = []
+        self.places = threading.BoundedSemaphore(taille_max)
+        self.verrou = threading.Lock()
+
+    @contextlib.contextmanager
+    def connexion(self, neuve=False):
+        """
+        Fournit une connexion du pool, rendue à la sortie du bloc
+
+        Args:
+            neuve (bool): Ouvre une nouvelle connexion plutôt que d'en réutiliser une
+                (ex. après l'échec d'une connexion inactive fermée par le serveur)
+        """
+        with self.places:
+            with self.verrou:
+                client = self.libres.pop() if self.libres and not neuve else None
+            if client is None:
+                client = self.fabrique().connecter()
+
+            try:
+                yield client
+            except ErreurMessagerie:
+                # Réponse d'erreur du serveur : la connexion reste utilisable
+                with self.verrou:
+                    self.libres.append(client)
+                raise
+            except BaseException:
+                # Connexion dans un état inconnu : elle n'est pas remise dans le pool
+                client.fermer()
+                raise
+            with self.verrou:
+                self.libres.append(client)
+
+    def fermer(self):
+        """Ferme toutes les connexions libres"""
+        with self.verrou:
+            libres, self.libres = self.libres, []
+        for client in libres:
+            client.fermer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+def recuperer_messages(pool, adresse, ids, parallelisme=None):
+    """
+    Récupère des messages en parallèle sur les connexions d'un pool POP3
+
+    Returns:
+        dict: {id: contenu}
+    """
+    ids = list(ids)
+    parallelisme = parallelisme or pool.taille_max
+    lots = [ids[i::parallelisme] for i in range(parallelisme) if ids[i::parallelisme]]
+
+    def recuperer_lot(lot):
+        with pool.connexion() as client:
+            return client.recuperer_plusieurs(adresse, lot)
+
+    messages = {}
+    with ThreadPoolExecutor(max_workers=max(len(lots), 1)) as executeur:
+        for resultat in executeur.map(recuperer_lot, lots):
+            messages.update(resultat)
+    return messages
+
+class ClientNotifications:
+    """
+    Client synchrone du serveur de notifications (alternative à l'interrogation de STAT)
+
+    EXEMPLE :
+        with ClientNotifications() as notifications:
+            notifications.abonner('bob@example.com')
+            while True:
+                adresse, nombre = notifications.attendre()
+    """
+
+    def __init__(self, hote=HOTE, port=PORT_NOTIFICATIONS, delai=DELAI):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+        self.connexion = None
+        self.avis = collections.deque()  # Avis reçus en attendant une réponse
+
+    def connecter(self):
+        self.connexion = _ConnexionTexte(self.hote, self.port, self.delai)
+        verifier_pop3(self.connexion.lire_ligne())
+        return self
+
+    def _commande(self, commande):
+        """Envoie une commande ; les avis reçus avant la réponse sont mis de côté"""
+        self.connexion.envoyer(formater_commande(commande))
+        while (ligne := self.connexion.lire_ligne()).startswith("* "):
+            self.avis.append(analyser_avis(ligne))
+        return verifier_pop3(ligne)
+
+    def abonner(self, adresse):
+        """S'abonne aux avis de nouveau message d'une adresse"""
+        self._commande(f"SUBSCRIBE {adresse}")
+
+    def desabonner(self, adresse):
+        self._commande(f"UNSUBSCRIBE {adresse}")
+
+    def attendre(self, delai=None):
+        """
+        Attend le prochain avis
+
+        Args:
+            delai (float): Attente maximale en secondes (None : indéfiniment)
+
+        Returns:
+            tuple: (adresse, nombre de messages ou None), ou None si le délai expire
+        """
+        if self.avis:
+            return self.avis.popleft()
+        self.connexion.socket.settimeout(delai)
+        try:
+            return analyser_avis(self.connexion.lire_ligne())
+        except socket.timeout:
+            return None
+        finally:
+            self.connexion.socket.settimeout(self.delai)
+
+    def fermer(self):
+        if self.connexion is None:
+            return
+        try:
+            with contextlib.suppress(Exception):
+                self._commande("QUIT")
+        finally:
+            self.connexion.fermer()
+            self.connexion = None
+
+    def __enter__(self):
+        return self.connecter()
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+# ─── Clients asyncio ────────────────────────────────────────────────────────
+
+_DELAI_CONNEXION = object()  # Délai par défaut de _ConnexionTexteAsync.lire_ligne
+
+class _ConnexionTexteAsync:
+    """Flux asyncio lisant des réponses terminées par CRLF"""
+
+    def __init__(self, lecteur, ecrivain, delai):
+        self.lecteur = lecteur
+        self.ecrivain = ecrivain
+        self.delai = delai
+        self.tampon = b""
+
+    @classmethod
+    async def ouvrir(cls, hote, port, delai):
+        lecteur, ecrivain = await asyncio.wait_for(asyncio.open_connection(hote, port), delai)
+        return cls(lecteur, ecrivain, delai)
+
+    async def envoyer(self, donnees):
+        self.ecrivain.write(donnees)
+        await self.ecrivain.drain()
+
+    async def lire_ligne(self, delai=_DELAI_CONNEXION):
+        """
+        Retourne la prochaine réponse, quelle que soit sa taille (pas de limite du flux)
+
+        Args:
+            delai (float): Délai d'attente de chaque lecture (None : sans limite),
+                par défaut celui de la connexion
+        """
+        if delai is _DELAI_CONNEXION:
+            delai = self.delai
+        while b"\r\n" not in self.tampon:
+            # Une lecture annulée par le délai ne perd rien : le tampon est conservé
+            donnees = await asyncio.wait_for(self.lecteur.read(65536), delai)
+            if not donnees:
+                raise ConnectionError("Connexion fermée par le serveur")
+            self.tampon += donnees
+        ligne, self.tampon = self.tampon.split(b"\r\n", 1)
+        return ligne.decode('utf-8')
+
+    async def fermer(self):
+        self.ecrivain.close()
+        with contextlib.suppress(Exception):
+            await self.ecrivain.wait_closed()
+
+class ClientSMTPAsync:
+    """Client SMTP asyncio"""
+
+    def __init__(self, hote=HOTE, port=PORT_SMTP, delai=DELAI):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+        self.connexion = None
+        self.capacites = set()
+
+    async def connecter(self):
+        """Ouvre la connexion et s'identifie (EHLO, ou HELO si EHLO est refusé)"""
+        self.connexion = await _ConnexionTexteAsync.ouvrir(self.hote, self.port, self.delai)
+        verifier_smtp(*await self._lire_reponse(), "220")
+
+        await self.connexion.envoyer(formater_commande("EHLO localhost"))
+        code, lignes = await self._lire_reponse()
+        if code == "250":
+            self.capacites = {ligne.split()[0].upper() for ligne in lignes[1:] if ligne}
+        else:
+            await self._commande("HELO localhost", "250")
+        return self
+
+    async def _lire_reponse(self):
+        lignes = []
+        while True:
+            code, texte, derniere = analyser_ligne_smtp(await self.connexion.lire_ligne())
+            lignes.append(texte)
+            if derniere:
+                return code, lignes
+
+    async def _commande(self, commande, attendu):
+        await self.connexion.envoyer(formater_commande(commande))
+        return verifier_smtp(*await self._lire_reponse(), attendu)
+
+    async def envoyer(self, expediteur, destinataire, lignes):
+        """Envoie un message (voir ClientSMTP.envoyer)"""
+        try:
+            await self._transaction(expediteur, destinataire, lignes)
+        except ErreurMessagerie:
+            await self.connexion.envoyer(formater_commande("RSET"))
+            await self._lire_reponse()
+            raise
+
+    async def _transaction(self, expediteur, destinataire, lignes):
+        enveloppe = [(f"MAIL FROM:<{expediteur}>", "250"),
+                     (f"RCPT TO:<{destinataire}>", "250"),
+                     ("DATA", "354")]
+
+        if "PIPELINING" in self.capacites:
+            await self.connexion.envoyer(b"".join(formater_commande(c) for c, _ in enveloppe))
+            reponses = [await self._lire_reponse() for _ in enveloppe]
+            if reponses[-1][0] == "354" and any(code != attendu for (code, _), (_, attendu)
+                                                in zip(reponses, enveloppe)):
+                await self.connexion.envoyer(formater_donnees([]))
+                await self._lire_reponse()
+            for (code, textes), (_, attendu) in zip(reponses, enveloppe):
+                verifier_smtp(code, textes, attendu)
+        else:
+            for commande, attendu in enveloppe:
+                await self._commande(commande, attendu)
+
+        await self.connexion.envoyer(formater_donnees(list(lignes)))
+        verifier_smtp(*await self._lire_reponse(), "250")
+
+    async def fermer(self):
+        """Envoie QUIT puis ferme la connexion"""
+        if self.connexion is None:
+            return
+        try:
+            # Réponse illisible ou flux en erreur : la connexion est fermée quand même
+            with contextlib.suppress(Exception):
+                await self._commande("QUIT", "221")
+        finally:
+            await self.connexion.fermer()
+            self.connexion = None
+
+    async def __aenter__(self):
+        return await self.connecter()
+
+    async def __aexit__(self, *exc):
+        await self.fermer()
+
+class ClientPOP3Async:
+    """Client POP3 asyncio"""
+
+    def __init__(self, hote=HOTE, port=PORT_POP3, delai=DELAI):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+        self.connexion = None
+        self.capacites = set()
+
+    async def connecter(self):
+        """Ouvre la connexion et interroge les capacités du serveur (CAPA)"""
+        self.connexion = await _ConnexionTexteAsync.ouvrir(self.hote, self.port, self.delai)
+        verifier_pop3(await self.connexion.lire_ligne())
+
+        await self.connexion.envoyer(formater_commande("CAPA"))
+        if (await self.connexion.lire_ligne()).startswith("+OK"):
+            self.capacites = set(await self._lire_multiligne())
+        return self
+
+    async def _lire_multiligne(self):
+        lignes = []
+        while (ligne := await self.connexion.lire_ligne()) != ".":
+            lignes.append(ligne[1:] if ligne.startswith("..") else ligne)
+        return lignes
+
+    async def _commande(self, commande):
+        await self.connexion.envoyer(formater_commande(commande))
+        return verifier_pop3(await self.connexion.lire_ligne())
+
+    async def stat(self, adresse):
+        """Retourne (nombre de messages, taille totale)"""
+        return analyser_stat(await self._commande(f"STAT {adresse}"))
+
+    async def lister(self, adresse):
+        """Retourne la liste [[id, expéditeur, taille], ...]"""
+        return analyser_liste(await self._commande(f"LIST {adresse}"))
+
+    async def recuperer(self, adresse, id_msg):
+        """Retourne le contenu d'un message"""
+        return await self._commande(f"RETR {id_msg} {adresse}")
+
+    async def supprimer(self, adresse, id_msg):
+        """Supprime un message (les messages suivants sont renumérotés)"""
+        await self._commande(f"DELE {id_msg} {adresse}")
+
+    async def rechercher(self, adresse, termes):
+        """Retourne les ID des messages contenant tous les termes (extension SEARCH)"""
+        return analyser_liste(await self._commande(f"SEARCH {' '.join(termes)} {adresse}"))
+
+    async def recuperer_plusieurs(self, adresse, ids):
+        """Récupère plusieurs messages, en pipelining si le serveur l'annonce"""
+        ids = list(ids)
+        if "PIPELINING" not in self.capacites:
+            return {id_msg: await self.recuperer(adresse, id_msg) for id_msg in ids}
+
+        await self.connexion.envoyer(b"".join(formater_commande(f"RETR {id_msg} {adresse}") for id_msg in ids))
+        reponses = [await self.connexion.lire_ligne() for _ in ids]
+        return {id_msg: verifier_pop3(reponse) for id_msg, reponse in zip(ids, reponses)}
+
+    async def fermer(self):
+        """Envoie QUIT puis ferme la connexion"""
+        if self.connexion is None:
+            return
+        try:
+            # Réponse illisible ou flux en erreur : la connexion est fermée quand même
+            with contextlib.suppress(Exception):
+                await self._commande("QUIT")
+        finally:
+            await self.connexion.fermer()
+            self.connexion = None
+
+    async def __aenter__(self):
+        return await self.connecter()
+
+    async def __aexit__(self, *exc):
+        await self.fermer()
+
+class PoolConnexionsAsync:
+    """
+    Pool de connexions asyncio (à utiliser dans une seule boucle d'événements)
+
+    Args:
+        fabrique: Fonction sans argument créant un client asyncio non connecté
+        taille_max (int): Nombre maximal de connexions ouvertes
+    """
+
+    def __init__(self, fabrique, taille_max=8):
+        self.fabrique = fabrique
+        self.taille_max = taille_max
+        self.libres = []
+        self.places = asyncio.Semaphore(taille_max)
+
+    @contextlib.asynccontextmanager
+    async def connexion(self):
+        """Fournit une connexion du pool, rendue à la sortie du bloc"""
+        async with self.places:
+            client = self.libres.pop() if self.libres else await self.fabrique().connecter()
+            try:
+                yield client
+            except ErreurMessagerie:
+                self.libres.append(client)
+                raise
+            except BaseException:
+                await client.fermer()
+                raise
+            self.libres.append(client)
+
+    async def fermer(self):
+        """Ferme toutes les connexions libres"""
+        libres, self.libres = self.libres, []
+        await asyncio.gather(*(client.fermer() for client in libres))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fermer()
+
+async def recuperer_messages_async(pool, adresse, ids, parallelisme=None):
+    """
+    Récupère des messages en parallèle sur les connexions d'un pool POP3 asyncio
+
+    Returns:
+        dict: {id: contenu}
+    """
+    ids = list(ids)
+    parallelisme = parallelisme or pool.taille_max
+    lots = [ids[i::parallelisme] for i in range(parallelisme) if ids[i::parallelisme]]
+
+    async def recuperer_lot(lot):
+        async with pool.connexion() as client:
+            return await client.recuperer_plusieurs(adresse, lot)
+
+    messages = {}
+    for resultat in await asyncio.gather(*(recuperer_lot(lot) for lot in lots)):
+        messages.update(resultat)
+    return messages
+
+class ClientNotificationsAsync:
+    """Client asyncio du serveur de notifications (voir ClientNotifications)"""
+
+    def __init__(self, hote=HOTE, port=PORT_NOTIFICATIONS, delai=DELAI):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+        self.connexion = None
+        self.avis = collections.deque()
+
+    async def connecter(self):
+        self.connexion = await _ConnexionTexteAsync.ouvrir(self.hote, self.port, self.delai)
+        verifier_pop3(await self.connexion.lire_ligne())
+        return self
+
+    async def _commande(self, commande):
+        await self.connexion.envoyer(formater_commande(commande))
+        while (ligne := await self.connexion.lire_ligne()).startswith("* "):
+            self.avis.append(analyser_avis(ligne))
+        return verifier_pop3(ligne)
+
+    async def abonner(self, adresse):
+        """S'abonne aux avis de nouveau message d'une adresse"""
+        await self._commande(f"SUBSCRIBE {adresse}")
+
+    async def desabonner(self, adresse):
+        await self._commande(f"UNSUBSCRIBE {adresse}")
+
+    async def attendre(self, delai=None):
+        """Attend le prochain avis : (adresse, nombre), ou None si le délai expire"""
+        if self.avis:
+            return self.avis.popleft()
+        try:
+            ligne = await self.connexion.lire_ligne(delai)
+        except asyncio.TimeoutError:
+            return None
+        return analyser_avis(ligne)
+
+    async def fermer(self):
+        if self.connexion is None:
+            return
+        try:
+            # Réponse illisible ou flux en erreur : la connexion est fermée quand même
+            with contextlib.suppress(Exception):
+                await self._commande("QUIT")
+        finally:
+            await self.connexion.fermer()
+            self.connexion = None
+
+    async def __aenter__(self):
+        return await self.connecter()
+
+    async def __aexit__(self, *exc):
+        await self.fermer()
@@ -0,0 +1,247 @@
+import contextlib
+import io
+import socket
+import tempfile
+import threading
+import time
+from relais_smtp import FileRelais
+from serveur_messagerie import ServeurMessagerie
+from stockage import StockageMessage
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Essai de la file sortante (relais_smtp.py) contre un serveur SMTP distant simulé.
+Le serveur simulé répond selon la partie locale du destinataire :
+    - accepte@... : message accepté (250)
+    - refuse@...  : refus définitif au RCPT (550)
+    - occupe@...  : refus temporaire au RCPT (450) pour les NB_REFUS premières tentatives
+    - toujours_occupe@... : refus temporaire (450) à chaque tentative
+    - MAIL dans une transaction non close par RSET : 503, comme un vrai serveur
+Un second serveur simulé envoie une bannière illisible (Latin-1 au lieu d'UTF-8).
+
+Vérifie :
+    - la livraison d'un message accepté
+    - l'avis de non-remise renvoyé à l'expéditeur local après un 5xx
+    - les nouvelles tentatives à délai exponentiel après un 4xx, puis la livraison
+    - la non-remise après max_tentatives échecs temporaires
+    - la réutilisation des connexions après un refus (RSET)
+    - la livraison sans nouvelle tentative différée après la fermeture par le serveur
+      d'une connexion inactive du pool
+    - la survie des travailleurs après une réponse illisible (entrée replanifiée)
+
+Usage : python essai_relais.py
+"""
+
+# Configuration
+PORT_DISTANT = 45025
+PORT_ILLISIBLE = 45026
+DELAI_INITIAL = 0.2     # Délai (s) avant la première nouvelle tentative
+NB_REFUS = 2            # Refus temporaires avant acceptation pour occupe@
+DELAI_MAX_ESSAI = 10.0  # Durée maximale (s) d'attente d'un résultat
+EXPEDITEUR = 'alice@local.fr'
+
+class ServeurDistantSimule(ServeurMessagerie):
+    """Serveur SMTP minimal dont les réponses au RCPT dépendent du destinataire"""
+
+    def __init__(self, port):
+        super().__init__(port, None)
+        self.recus = []           # Destinataires des messages acceptés
+        self.tentatives = {}      # {destinataire: [dates des RCPT]}
+        self.nb_connexions = 0
+        self.sockets = []         # Connexions ouvertes (fermer_connexions)
+        self.verrou = threading.Lock()
+
+    def nom_protocole(self):
+        return "DISTANT"
+
+    def fermer_connexions(self):
+        """Ferme les connexions ouvertes, comme un serveur qui expire les connexions inactives"""
+        with self.verrou:
+            sockets, self.sockets = self.sockets, []
+        for socket_client in sockets:
+            try:
+                socket_client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def reponse_rcpt(self, destinataire):
+        with self.verrou:
+            dates = self.tentatives.setdefault(destinataire, [])
+            dates.append(time.time())
+            nb_tentatives = len(dates)
+        local = destinataire.partition('@')[0]
+        if local == 'refuse':
+            return "550 Boîte inconnue"
+        if local == 'occupe' and nb_tentatives <= NB_REFUS:
+            return "450 Boîte temporairement indisponible"
+        if local == 'toujours_occupe':
+            return "450 Boîte temporairement indisponible"
+        return "250 OK"
+
+    def gerer_client(self, socket_client, adresse_client):
+        with self.verrou:
+            self.nb_connexions += 1
+            self.sockets.append(socket_client)
+
+        def repondre(texte):
+            socket_client.sendall(f"{texte}\r\n".encode('utf-8'))
+
+        with socket_client:
+            # Le délai permet à la boucle de lecture de voir l'arrêt du serveur
+            socket_client.settimeout(1.0)
+            transaction = False
+            destinataire = None
+            donnees = None
+            try:
+                repondre("220 distant.fr Service prêt")
+                for ligne in self._lire_lignes(socket_client):
+                    if donnees is not None:
+                        if ligne == ".":
+                            with self.verrou:
+                                self.recus.append(destinataire)
+                            transaction = False
+                            destinataire = donnees = None
+                            repondre("250 Message accepté")
+                        continue
+
+                    commande = ligne.split(' ', 1)[0].upper()
+                    if commande in ("EHLO", "HELO"):
+                        repondre("250 OK")
+                    elif commande == "MAIL":
+                        # Comme un vrai serveur : une transaction ouverte doit être close par RSET
+                        if transaction:
+                            repondre("503 Transaction déjà en cours")
+                        else:
+                            transaction = True
+                            repondre("250 OK")
+                    elif commande == "RCPT":
+                        destinataire = ligne.partition('<')[2].rstrip('>')
+                        reponse = self.reponse_rcpt(destinataire)
+                        if not reponse.startswith("250"):
+                            destinataire = None
+                        repondre(reponse)
+                    elif commande == "DATA":
+                        if destinataire is None:
+                            repondre("503 Aucun destinataire valide")
+                        else:
+                            donnees = []
+                            repondre("354 Terminer par <CRLF>.<CRLF>")
+                    elif commande == "RSET":
+                        transaction = False
+                        destinataire = None
+                        repondre("250 OK")
+                    elif commande == "QUIT":
+                        repondre("221 Au revoir")
+                        break
+                    else:
+                        repondre("502 Commande non implémentée")
+            except OSError:
+                pass
+
+class ServeurIllisible(ServeurMessagerie):
+    """Serveur distant dont la bannière n'est pas de l'UTF-8"""
+
+    def nom_protocole(self):
+        return "ILLISIBLE"
+
+    def gerer_client(self, socket_client, adresse_client):
+        with socket_client:
+            try:
+                socket_client.sendall("220 café\r\n".encode('latin-1'))
+                socket_client.recv(1024)
+            except OSError:
+                pass
+
+def attendre(condition):
+    """Attend que condition() soit vraie, au plus DELAI_MAX_ESSAI secondes"""
+    fin = time.time() + DELAI_MAX_ESSAI
+    while time.time() < fin:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+def verifier(description, resultat):
+    print(f"  [{'OK' if resultat else 'ÉCHEC'}] {description}")
+    return resultat
+
+def main():
+    print("=== Essai de la file sortante contre un serveur distant simulé ===\n")
+    distant = ServeurDistantSimule(PORT_DISTANT)
+    illisible = ServeurIllisible(PORT_ILLISIBLE, None)
+    threads = [threading.Thread(target=distant.demarrer), threading.Thread(target=illisible.demarrer)]
+
+    with tempfile.TemporaryDirectory() as dossier, contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        time.sleep(0.3)
+
+        stockage = StockageMessage(f"{dossier}/Boîte_mail")
+        relais = FileRelais(stockage, dossier=f"{dossier}/File_sortante", domaines_locaux=['local.fr'],
+                            routes={'distant.fr': ('localhost', PORT_DISTANT),
+                                    'illisible.fr': ('localhost', PORT_ILLISIBLE)},
+                            nb_travailleurs=2, connexions_par_destination=1,
+                            delai_initial=DELAI_INITIAL, max_tentatives=4)
+        relais.demarrer()
+
+        for destinataire in ('refuse@distant.fr', 'accepte@distant.fr', 'occupe@distant.fr',
+                             'toujours_occupe@distant.fr'):
+            relais.ajouter(EXPEDITEUR, destinataire, [f"Bonjour {destinataire}"])
+        vide = attendre(lambda: relais.taille() == 0)
+        nb_connexions = distant.nb_connexions
+        nb_acceptes = distant.recus.count('accepte@distant.fr')
+
+        # Connexion du pool fermée par le distant : livrée aussitôt, sans délai de 60 s
+        distant.fermer_connexions()
+        time.sleep(0.2)
+        relais.delai_initial = 60.0
+        relais.ajouter(EXPEDITEUR, 'accepte@distant.fr', ["Après fermeture de la connexion inactive"])
+        apres_fermeture = attendre(lambda: relais.taille() == 0)
+
+        # Bannière illisible : l'entrée reste en file et les travailleurs survivent
+        relais.ajouter(EXPEDITEUR, 'bob@illisible.fr', ["Bonjour"])
+        replanifiee = attendre(lambda: any(entree['tentatives'] >= 1 for entree in relais.entrees.values()))
+        derniere_erreur = next(iter(relais.entrees.values()), {}).get('derniere_erreur') or ""
+        travailleurs_vivants = all(thread.is_alive() for thread in relais.travailleurs)
+
+        relais.arreter()
+        distant.arreter()
+        illisible.arreter()
+        for thread in threads:
+            thread.join()
+        boite = stockage.charger_boite_mail(EXPEDITEUR) or {}
+
+    avis = [message['contenu'] for message in boite.values()]
+    dates = distant.tentatives.get('occupe@distant.fr', [])
+    ecarts = [fin - debut for debut, fin in zip(dates, dates[1:])]
+
+    resultats = [
+        verifier("File sortante vidée", vide),
+        verifier("Message accepté livré", nb_acceptes == 1),
+        verifier("Avis de non-remise après 550",
+                 any('refuse@distant.fr' in texte and '550' in texte for texte in avis)),
+        verifier("Message refusé non livré", 'refuse@distant.fr' not in distant.recus),
+        verifier(f"{NB_REFUS} refus 450 puis livraison",
+                 len(dates) == NB_REFUS + 1 and distant.recus.count('occupe@distant.fr') == 1),
+        verifier("Délais exponentiels entre tentatives "
+                 f"({', '.join(f'{ecart:.2f} s' for ecart in ecarts)})",
+                 len(ecarts) == NB_REFUS and ecarts[0] >= DELAI_INITIAL * 0.9
+                 and ecarts[1] >= 2 * DELAI_INITIAL * 0.9),
+        verifier("Avis de non-remise après 4 échecs temporaires",
+                 any('toujours_occupe@distant.fr' in texte and 'Abandon' in texte for texte in avis)),
+        verifier(f"Connexion réutilisée après les refus ({nb_connexions} connexion(s))",
+                 nb_connexions == 1),
+        verifier("Livraison immédiate après fermeture d'une connexion inactive",
+                 apres_fermeture and distant.recus.count('accepte@distant.fr') == 2),
+        verifier(f"Bannière illisible : entrée replanifiée ({derniere_erreur[:40]})",
+                 replanifiee and 'UnicodeDecodeError' in derniere_erreur),
+        verifier("Travailleurs toujours actifs après l'erreur", travailleurs_vivants),
+    ]
+    print(f"\n{sum(resultats)}/{len(resultats)} vérifications réussies")
+    return all(resultats)
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,217 @@
+import json
+import os
+import re
+import sys
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Index inversé des boîtes mail pour la recherche plein texte.
+Pour chaque adresse, associe chaque terme aux identifiants des messages qui le contiennent :
+    - "de:<adresse>"   : expéditeur du message
+    - "pour:<adresse>" : destinataire du message
+    - mots du corps, en minuscules
+
+L'index est tenu en mémoire et persisté dans un journal (une ligne JSON par message)
+auquel chaque nouveau message est ajouté. Après une suppression, une ligne
+"reinitialiser" suivie des entrées renumérotées remplace les entrées de l'adresse ;
+le journal est compacté lorsque ces lignes périmées deviennent majoritaires.
+Il peut être reconstruit à partir des boîtes mail (StockageMessage.reconstruire_index).
+
+N'est pas thread-safe : les appels passent par StockageMessage, sous son verrou.
+
+Usage (reconstruction hors ligne) : python index_recherche.py [dossier_mail]
+"""
+
+MOTIF_MOT = re.compile(r"\w+")
+SEUIL_COMPACTAGE = 1000  # Lignes de journal minimales avant un compactage
+
+def extraire_termes(expediteur, destinataire, contenu_message):
+    """
+    Retourne l'ensemble des termes indexés pour un message
+
+    Args:
+        expediteur (str): Adresse de l'expéditeur
+        destinataire (str): Adresse du destinataire
+        contenu_message (list): Liste des lignes du message
+    """
+    termes = {f"de:{expediteur.lower()}", f"pour:{destinataire.lower()}"}
+    for ligne in contenu_message:
+        termes.update(MOTIF_MOT.findall(ligne.lower()))
+    return termes
+
+def normaliser_requete(termes_recherche):
+    """Convertit les termes saisis par un client en termes d'index"""
+    termes = []
+    for terme in termes_recherche:
+        terme = terme.lower()
+        if terme.startswith(('de:', 'pour:')):
+            termes.append(terme)
+        else:
+            termes.extend(MOTIF_MOT.findall(terme))
+    return termes
+
+class IndexRecherche:
+    """Index inversé {adresse: {terme: ensemble d'identifiants}}"""
+
+    def __init__(self, chemin_journal):
+        self.chemin_journal = chemin_journal
+        self.index = {}
+        self.nombre_messages = {}  # Nombre de messages indexés par adresse
+        self.lignes_journal = 0    # Lignes du journal, périmées comprises
+
+    def vider(self):
+        """Vide l'index en mémoire"""
+        self.index = {}
+        self.nombre_messages = {}
+        self.lignes_journal = 0
+
+    def prochain_id(self, adresse):
+        """Retourne l'identifiant qu'aura le prochain message de l'adresse"""
+        return self.nombre_messages.get(adresse, 0) + 1
+
+    def ajouter(self, adresse, id_msg, termes, persister=True):
+        """
+        Indexe un message
+
+        Args:
+            adresse (str): Boîte mail contenant le message
+            id_msg (int): Identifiant du message dans la boîte
+            termes (set): Termes du message (voir extraire_termes)
+            persister (bool): Ajoute l'entrée au journal sur disque
+        """
+        index_adresse = self.index.setdefault(adresse, {})
+        for terme in termes:
+            index_adresse.setdefault(terme, set()).add(id_msg)
+        self.nombre_messages[adresse] = max(self.nombre_messages.get(adresse, 0), id_msg)
+
+        if persister:
+            with open(self.chemin_journal, 'a', encoding='utf-8') as f:
+                f.write(self._formater_entree(adresse, id_msg, termes))
+            self.lignes_journal += 1
+
+    def reindexer(self, adresse, entrees):
+        """
+        Remplace toutes les entrées d'une adresse (les ID sont décalés après une suppression)
+
+        Args:
+            adresse (str): Boîte mail à réindexer
+            entrees (iterable): Tuples (id_msg, termes)
+        """
+        entrees = list(entrees)
+        self.index.pop(adresse, None)
+        self.nombre_messages.pop(adresse, None)
+        for id_msg, termes in entrees:
+            self.ajouter(adresse, id_msg, termes, persister=False)
+
+        # Le journal garde les anciennes entrées : il est compacté s'il en contient trop
+        nb_entrees = sum(self.nombre_messages.values())
+        if self.lignes_journal + len(entrees) + 1 > max(SEUIL_COMPACTAGE, 2 * nb_entrees):
+            self.compacter()
+            return
+
+        with open(self.chemin_journal, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"adresse": adresse, "reinitialiser": True}, ensure_ascii=False) + "\n")
+        self.lignes_journal += 1
+        self.journaliser(adresse, entrees)
+
+    def compacter(self):
+        """Réécrit le journal avec les seules entrées de l'index en mémoire"""
+        termes_par_message = {}
+        for adresse, index_adresse in self.index.items():
+            for terme, ids in index_adresse.items():
+                for id_msg in ids:
+                    termes_par_message.setdefault((adresse, id_msg), set()).add(terme)
+        self.enregistrer([(adresse, id_msg, termes)
+                          for (adresse, id_msg), termes in sorted(termes_par_message.items())])
+
+    def journaliser(self, adresse, entrees):
+        """
+        Ajoute des entrées au journal sans les charger en mémoire (outils hors ligne)
+
+        Args:
+            adresse (str): Boîte mail contenant les messages
+            entrees (iterable): Tuples (id_msg, termes)
+        """
+        entrees = list(entrees)
+        with open(self.chemin_journal, 'a', encoding='utf-8') as f:
+            f.writelines(self._formater_entree(adresse, id_msg, termes) for id_msg, termes in entrees)
+        self.lignes_journal += len(entrees)
+
+    def rechercher(self, adresse, termes_recherche):
+        """
+        Retourne les identifiants des messages contenant tous les termes
+
+        Returns:
+            list: Identifiants triés (liste vide si aucun résultat)
+        """
+        termes = normaliser_requete(termes_recherche)
+        index_adresse = self.index.get(adresse)
+        if not termes or not index_adresse:
+            return []
+
+        # Intersection en partant de l'ensemble le plus petit
+        ensembles = sorted((index_adresse.get(terme, set()) for terme in termes), key=len)
+        resultat = set(ensembles[0])
+        for ensemble in ensembles[1:]:
+            resultat &= ensemble
+        return sorted(resultat)
+
+    def charger(self):
+        """
+        Recharge l'index depuis le journal
+
+        Returns:
+            bool: False si le journal n'existe pas ou est illisible
+        """
+        self.vider()
+        if not os.path.exists(self.chemin_journal):
+            return False
+
+        try:
+            with open(self.chemin_journal, 'r', encoding='utf-8') as f:
+                for ligne in f:
+                    if not ligne.strip():
+                        continue
+                    self.lignes_journal += 1
+                    entree = json.loads(ligne)
+                    if entree.get('reinitialiser'):
+                        self.index.pop(entree['adresse'], None)
+                        self.nombre_messages.pop(entree['adresse'], None)
+                        continue
+                    self.ajouter(entree['adresse'], entree['id'], entree['termes'], persister=False)
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Index] Journal illisible ({e}), reconstruction nécessaire")
+            self.vider()
+            return False
+
+    def enregistrer(self, entrees):
+        """
+        Remplace le journal par les entrées fournies (écriture atomique)
+
+        Args:
+            entrees (iterable): Tuples (adresse, id_msg, termes)
+        """
+        self.vider()
+        chemin_temporaire = self.chemin_journal + '.tmp'
+        with open(chemin_temporaire, 'w', encoding='utf-8') as f:
+            for adresse, id_msg, termes in entrees:
+                self.ajouter(adresse, id_msg, termes, persister=False)
+                f.write(self._formater_entree(adresse, id_msg, termes))
+                self.lignes_journal += 1
+        os.replace(chemin_temporaire, self.chemin_journal)
+
+    def _formater_entree(self, adresse, id_msg, termes):
+        """Retourne la ligne de journal d'un message"""
+        return json.dumps({"adresse": adresse, "id": id_msg, "termes": sorted(termes)},
+                          ensure_ascii=False) + "\n"
+
+if __name__ == "__main__":
+    from stockage import StockageMessage
+
+    dossier = sys.argv[1] if len(sys.argv) > 1 else 'Boîte_mail'
+    stockage = StockageMessage(dossier)
+    stockage.reconstruire_index()
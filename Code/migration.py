@@ -0,0 +1,266 @@
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from index_recherche import IndexRecherche, extraire_termes
+from stockage import ERREURS_DECOMPRESSION, FICHIER_INDEX, SEPARATEUR, StockageMessage
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Outil d'import / migration en masse des dossiers Boîte_mail existants.
+
+Chaque fichier <adresse>.txt est traité par un processus d'un pool :
+    - lecture par projection mémoire (mmap)
+    - validation du découpage "="*50 de chaque message (De:, Pour:, Message:)
+    - réécriture dans le dossier destination avec les options de stockage choisies
+      (compression, répartition en sous-dossiers et racines), par écriture atomique
+    - extraction des termes de l'index de recherche, écrit par le processus principal
+
+La progression est affichée régulièrement. Les boîtes terminées sont notées dans
+un fichier d'état du dossier destination : relancer la même commande reprend
+la migration là où elle s'était arrêtée. Le fichier d'état est supprimé une fois
+la migration terminée sans erreur. Avec --index-seulement, l'index est toujours
+reconstruit entièrement, sans fichier d'état.
+
+Usage :
+    python migration.py Boîte_mail Boîte_mail_v2 --compression zlib
+    python migration.py Boîte_mail Boîte_mail_v2 --niveaux 2 --racine /disque1 --racine /disque2
+    python migration.py Boîte_mail --index-seulement
+"""
+
+FICHIER_ETAT = 'migration_etat.jsonl'
+SEPARATEUR_OCTETS = SEPARATEUR.encode('utf-8')
+
+def decouper_boite(chemin):
+    """
+    Découpe un fichier de boîte mail en blocs de messages (lecture par mmap)
+
+    Returns:
+        tuple: (liste des blocs texte, liste des erreurs de découpage)
+    """
+    blocs = []
+    erreurs = []
+    with open(chemin, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return blocs, erreurs
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as donnees:
+            position = 0
+            while True:
+                fin = donnees.find(SEPARATEUR_OCTETS, position)
+                if fin == -1:
+                    break
+                blocs.append(donnees[position:fin].decode('utf-8'))
+                position = fin + len(SEPARATEUR_OCTETS)
+
+            # Après le dernier séparateur, il ne doit rester que des sauts de ligne
+            if donnees[position:].strip():
+                erreurs.append(f"message {len(blocs) + 1} : séparateur de fin manquant")
+
+    for id_msg, bloc in enumerate(blocs, start=1):
+        if "De:" not in bloc or "Pour:" not in bloc or "Message:\n" not in bloc:
+            erreurs.append(f"message {id_msg} : en-têtes De:/Pour:/Message: incomplets")
+    return blocs, erreurs
+
+def migrer_boite(chemins_source, adresse, options):
+    """
+    Migre une boîte mail (exécuté dans un processus du pool)
+
+    Args:
+        chemins_source (list): Fichiers <adresse>.txt à lire (plusieurs si la boîte
+            existe à la fois à plat et répartie) ; leurs messages sont regroupés
+        adresse (str): Adresse de la boîte
+        options (dict): dossier destination, compression, seuil, racines, niveaux, index_seulement
+
+    Returns:
+        dict: {adresse, nb_messages, erreurs, index: [(id, termes)]}
+    """
+    resultat = {"adresse": adresse, "nb_messages": 0, "erreurs": [], "index": []}
+    destination = StockageMessage(options['destination'], compression=options['compression'],
+                                  seuil_compression=options['seuil'], indexer=False,
+                                  racines=options['racines'], niveaux_repartition=options['niveaux'])
+
+    blocs = []
+    for chemin_source in chemins_source:
+        prefixe = f"{chemin_source} : " if len(chemins_source) > 1 else ""
+        try:
+            blocs_fichier, erreurs = decouper_boite(chemin_source)
+        except (OSError, UnicodeDecodeError) as e:
+            blocs_fichier, erreurs = [], [str(e)]
+        resultat["erreurs"].extend(prefixe + erreur for erreur in erreurs)
+        blocs.extend(blocs_fichier)
+
+    if resultat["erreurs"]:
+        return resultat
+
+    messages = []
+    for id_msg, bloc in enumerate(blocs, start=1):
+        # Retire les sauts de ligne du séparateur précédent et celui de fin de corps
+        try:
+            bloc = destination._decompresser_bloc(bloc).lstrip('\n')
+        except ERREURS_DECOMPRESSION as e:
+            # Boîte ignorée plutôt que réécrite sans le corps d'origine
+            resultat["erreurs"].append(f"message {id_msg} : corps compressé illisible ({e!r})")
+            return resultat
+        if bloc.endswith('\n'):
+            bloc = bloc[:-1]
+        expediteur, destinataire, lignes = destination.analyser_message(bloc)
+        messages.append((expediteur, destinataire, lignes))
+        resultat["index"].append((id_msg, sorted(extraire_termes(expediteur, destinataire, lignes))))
+
+    if not options['index_seulement']:
+        chemin = destination._chemin_attendu(adresse)
+        chemin_temporaire = chemin + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            with open(chemin_temporaire, 'w', encoding='utf-8') as f:
+                for expediteur, destinataire, lignes in messages:
+                    f.write(destination._formater_message(expediteur, destinataire, lignes))
+            os.replace(chemin_temporaire, chemin)
+        except OSError as e:
+            # Disque plein, droits... : la boîte est signalée en erreur, les autres continuent
+            resultat["erreurs"].append(f"écriture impossible : {e}")
+            with contextlib.suppress(OSError):
+                os.remove(chemin_temporaire)
+            return resultat
+
+    resultat["nb_messages"] = len(messages)
+    return resultat
+
+def chevauche(destination, source):
+    """Retourne True si destination est le dossier source ou se trouve à l'intérieur"""
+    destination = os.path.realpath(destination)
+    source = os.path.realpath(source)
+    return os.path.commonpath([destination, source]) == source
+
+def charger_etat(chemin_etat):
+    """Retourne l'ensemble des adresses déjà migrées"""
+    if not os.path.exists(chemin_etat):
+        return set()
+    with open(chemin_etat, 'r', encoding='utf-8') as f:
+        return {json.loads(ligne)['adresse'] for ligne in f if ligne.strip()}
+
+def migrer(source, destination, compression=None, seuil=512, racines=None, niveaux=0,
+           processus=None, index_seulement=False):
+    """
+    Migre toutes les boîtes mail de source vers destination
+
+    Returns:
+        bool: True si toutes les boîtes ont été migrées sans erreur
+
+    Raises:
+        ValueError: Si la destination (ou une racine) est la source ou s'y trouve
+    """
+    if index_seulement:
+        destination = source
+    else:
+        # Les boîtes réécrites seraient relues comme des boîtes source (doublons)
+        for dossier in [destination] + list(racines or []):
+            if chevauche(dossier, source):
+                raise ValueError(f"{dossier} ne doit pas être le dossier source ni s'y trouver "
+                                 f"(utiliser --index-seulement pour indexer la source)")
+    os.makedirs(destination, exist_ok=True)
+
+    # Reconstruction d'index : pas de reprise, une boîte déjà traitée a pu recevoir des messages
+    chemin_etat = None if index_seulement else os.path.join(destination, FICHIER_ETAT)
+    deja_faites = charger_etat(chemin_etat) if chemin_etat else set()
+
+    # Nouvelle migration : l'index destination repart de zéro
+    index = IndexRecherche(os.path.join(destination, FICHIER_INDEX))
+    if not deja_faites and os.path.exists(index.chemin_journal):
+        os.remove(index.chemin_journal)
+
+    # Une adresse présente à plusieurs endroits (plat et réparti, plusieurs racines)
+    # est migrée par une seule tâche qui regroupe ses fichiers
+    source_stockage = StockageMessage(source, indexer=False)
+    boites = {}
+    for adresse, chemin in source_stockage.lister_boites():
+        boites.setdefault(adresse, []).append(chemin)
+    a_faire = [(adresse, chemins) for adresse, chemins in boites.items() if adresse not in deja_faites]
+    total = len(a_faire) + len(deja_faites)
+    print(f"[Migration] {total} boîtes trouvées, {len(deja_faites)} déjà migrées, {len(a_faire)} à traiter")
+
+    options = {"destination": destination, "compression": compression, "seuil": seuil,
+               "racines": racines, "niveaux": niveaux, "index_seulement": index_seulement}
+    faites = len(deja_faites)
+    nb_messages = 0
+    echecs = []
+    debut = time.perf_counter()
+    dernier_affichage = debut
+
+    with ProcessPoolExecutor(max_workers=processus) as pool, \
+         (open(chemin_etat, 'a', encoding='utf-8') if chemin_etat else contextlib.nullcontext()) as etat:
+        taches = [pool.submit(migrer_boite, chemins, adresse, options)
+                  for adresse, chemins in a_faire]
+
+        for tache in as_completed(taches):
+            resultat = tache.result()
+            adresse = resultat["adresse"]
+
+            if resultat["erreurs"]:
+                echecs.append(resultat)
+                print(f"[Migration] Boîte {adresse} ignorée : {'; '.join(resultat['erreurs'])}")
+            else:
+                # L'index est écrit avant l'état : une reprise ne perd jamais d'entrée
+                index.journaliser(adresse, resultat["index"])
+                if etat is not None:
+                    etat.write(json.dumps({"adresse": adresse, "nb_messages": resultat["nb_messages"]},
+                                          ensure_ascii=False) + "\n")
+                    etat.flush()
+                nb_messages += resultat["nb_messages"]
+
+            faites += 1
+            maintenant = time.perf_counter()
+            if maintenant - dernier_affichage >= 1.0 or faites == total:
+                dernier_affichage = maintenant
+                debit = nb_messages / max(maintenant - debut, 1e-9)
+                print(f"[Migration] {faites}/{total} boîtes ({100 * faites // max(total, 1)}%)"
+                      f" - {nb_messages} messages - {debit:.0f} msg/s")
+
+    # Migration complète : une prochaine exécution repartira de zéro
+    if chemin_etat and not echecs:
+        os.remove(chemin_etat)
+
+    duree = time.perf_counter() - debut
+    print(f"[Migration] Terminé en {duree:.1f} s : {nb_messages} messages migrés, {len(echecs)} boîte(s) en erreur")
+    return not echecs
+
+def main():
+    parser = argparse.ArgumentParser(description="Migration en masse des dossiers Boîte_mail")
+    parser.add_argument('source', help="Dossier Boîte_mail existant")
+    parser.add_argument('destination', nargs='?', help="Dossier de destination")
+    parser.add_argument('--compression', choices=['zlib', 'lzma'], default=None,
+                        help="Compression des corps de message dans la destination")
+    parser.add_argument('--seuil', type=int, default=512,
+                        help="Taille minimale (octets) d'un corps compressé")
+    parser.add_argument('--niveaux', type=int, default=0,
+                        help="Niveaux de sous-dossiers de répartition dans la destination")
+    parser.add_argument('--racine', action='append', dest='racines', default=None,
+                        help="Racine de stockage de la destination (répétable)")
+    parser.add_argument('--processus', type=int, default=None,
+                        help="Nombre de processus (par défaut : nombre de coeurs)")
+    parser.add_argument('--index-seulement', action='store_true',
+                        help="Construit uniquement l'index de recherche de la source")
+    args = parser.parse_args()
+
+    if args.destination is None and not args.index_seulement:
+        parser.error("destination requise (ou --index-seulement)")
+
+    if not args.index_seulement:
+        for dossier in [args.destination] + (args.racines or []):
+            if chevauche(dossier, args.source):
+                parser.error(f"{dossier} est le dossier source ou s'y trouve (utiliser --index-seulement)")
+
+    succes = migrer(args.source, args.destination, compression=args.compression, seuil=args.seuil,
+                    racines=args.racines, niveaux=args.niveaux, processus=args.processus,
+                    index_seulement=args.index_seulement)
+    raise SystemExit(0 if succes else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import queue
+import socket
+import threading
+from serveur_messagerie import ServeurMessagerie
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Serveur de notifications : remplace l'interrogation périodique de STAT.
+Un client s'abonne à une ou plusieurs adresses ; à chaque livraison dans
+l'une d'elles, le stockage prévient ce serveur qui pousse aussitôt un avis.
+
+PROTOCOLE (port 65436 par défaut) :
+    SUBSCRIBE email@domain.com    -> +OK Abonné à email@domain.com
+    UNSUBSCRIBE email@domain.com  -> +OK Désabonné de email@domain.com
+    QUIT                          -> +OK Fermeture connexion
+    Avis poussé par le serveur    : * NEW email@domain.com [nombre de messages]
+
+Le thread qui livre le message ne fait que déposer l'avis dans la file de chaque
+abonné : un thread d'envoi par abonné le transmet, si bien qu'un abonné lent ne
+ralentit pas les livraisons. Un abonné qui ne lit plus ses avis (file pleine ou
+délai d'envoi dépassé) est déconnecté.
+"""
+
+DELAI_ENVOI = 1.0       # Délai maximal (s) d'envoi d'un avis à un abonné
+TAILLE_FILE_AVIS = 100  # Avis en attente au-delà desquels l'abonné est déconnecté
+
+class _Abonne:
+    """Connexion d'un abonné ; le verrou sérialise réponses et avis poussés"""
+
+    def __init__(self, socket_client, adresse_client):
+        self.socket = socket_client
+        self.adresse_client = adresse_client
+        self.verrou = threading.Lock()
+        self.file_avis = queue.Queue(maxsize=TAILLE_FILE_AVIS)
+        self.thread_envoi = threading.Thread(target=self._envoyer_avis,
+                                             name=f"Notif-{adresse_client[1]}")
+        self.thread_envoi.start()
+
+    def envoyer(self, texte):
+        with self.verrou:
+            self.socket.sendall(f"{texte}\r\n".encode('utf-8'))
+
+    def pousser(self, avis):
+        """Dépose un avis sans bloquer ; retourne False si la file de l'abonné est pleine"""
+        try:
+            self.file_avis.put_nowait(avis)
+            return True
+        except queue.Full:
+            return False
+
+    def _envoyer_avis(self):
+        """Thread d'envoi : transmet les avis de la file jusqu'à la sentinelle None"""
+        while (avis := self.file_avis.get()) is not None:
+            try:
+                self.envoyer(avis)
+            except OSError as e:
+                print(f"[NOTIF] Abonné {self.adresse_client} déconnecté: {e}")
+                self.fermer()
+                return
+
+    def fermer(self):
+        """Coupe la connexion : la boucle de lecture de l'abonné se termine"""
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def arreter_envoi(self):
+        """Arrête le thread d'envoi (fin de session, l'abonné est déjà désabonné)"""
+        # Les avis encore en file sont abandonnés : la connexion se termine
+        while True:
+            try:
+                self.file_avis.get_nowait()
+            except queue.Empty:
+                break
+        self.file_avis.put(None)
+        self.thread_envoi.join()
+
+class ServeurNotifications(ServeurMessagerie):
+    """Serveur d'abonnement aux avis de nouveau message"""
+
+    profilable = False  # Sessions sans fin : jamais échantillonnées par le profileur
+
+    def __init__(self, port, stockage):
+        super().__init__(port, stockage)
+        self.abonnements = {}  # {adresse: ensemble d'abonnés}
+        self.verrou_abonnements = threading.Lock()
+        stockage.ajouter_observateur(self.publier)
+
+    def nom_protocole(self):
+        return "NOTIF"
+
+    def publier(self, adresse, nb_messages):
+        """Pousse un avis de nouveau message aux abonnés d'une adresse (observateur du stockage)"""
+        with self.verrou_abonnements:
+            abonnes = list(self.abonnements.get(adresse, ()))
+        if not abonnes:
+            return
+
+        avis = f"* NEW {adresse}" + (f" {nb_messages}" if nb_messages is not None else "")
+        for abonne in abonnes:
+            if not abonne.pousser(avis):
+                print(f"[NOTIF] Abonné {abonne.adresse_client} trop lent, déconnecté")
+                self._desabonner_tout(abonne)
+                abonne.fermer()
+
+    def _desabonner_tout(self, abonne):
+        with self.verrou_abonnements:
+            for abonnes in self.abonnements.values():
+                abonnes.discard(abonne)
+            self.abonnements = {adresse: abonnes for adresse, abonnes in self.abonnements.items() if abonnes}
+
+    def gerer_client(self, socket_client, adresse_client):
+        """
+        Gère les abonnements d'un client
+
+        Args:
+            socket_client: Socket connectée au client
+            adresse_client: Tuple (IP, port) du client
+        """
+        print(f"[NOTIF] Connexion de {adresse_client}")
+        abonne = _Abonne(socket_client, adresse_client)
+
+        with socket_client:
+            # Le délai permet à la boucle de lecture de voir l'arrêt du serveur
+            socket_client.settimeout(DELAI_ENVOI)
+            try:
+                abonne.envoyer("+OK Service de notifications prêt")
+                for ligne in self._lire_lignes(socket_client):
+                    parties = ligne.split()
+                    if not parties:
+                        abonne.envoyer("-ERR Commande vide")
+                        continue
+
+                    match parties[0].upper():
+                        case "SUBSCRIBE" if len(parties) == 2:
+                            with self.verrou_abonnements:
+                                self.abonnements.setdefault(parties[1], set()).add(abonne)
+                            abonne.envoyer(f"+OK Abonné à {parties[1]}")
+
+                        case "UNSUBSCRIBE" if len(parties) == 2:
+                            with self.verrou_abonnements:
+                                self.abonnements.get(parties[1], set()).discard(abonne)
+                            abonne.envoyer(f"+OK Désabonné de {parties[1]}")
+
+                        case "QUIT":
+                            abonne.envoyer("+OK Fermeture connexion")
+                            break
+
+                        case "SUBSCRIBE" | "UNSUBSCRIBE":
+                            abonne.envoyer("-ERR Erreur syntaxe. Format: SUBSCRIBE email@domain.com")
+
+                        case _:
+                            abonne.envoyer("-ERR Commande non implémentée")
+
+            except OSError as e:
+                print(f"[NOTIF] Erreur: {e}")
+            finally:
+                self._desabonner_tout(abonne)
+                abonne.arreter_envoi()
@@ -1,4 +1,9 @@
+import argparse
 import threading
+from profilage import profileur
+from notifications import ServeurNotifications
+from relais_smtp import FileRelais
+from replication import ClientReplication, ServeurReplication
 from stockage import StockageMessage
 from serveur_smtp import ServeurSMTP
 from serveur_pop3 import ServeurPOP3
@@ -27,57 +32,148 @@ Thread Principal
 
 La classe StockageMessage est partagée entre les deux serveurs,
 avec un verrou (Lock) pour éviter les accès simultanés au fichiers.
+
+Usage :
+    python principal.py                 : lance les serveurs
+    python principal.py --reequilibrer  : range les boîtes mail selon la
+                                          répartition configurée, puis quitte
+    python principal.py --replication   : nœud primaire, diffuse aussi le journal
+                                          des modifications (port 65435)
+    python principal.py --replique-de HOTE:PORT --dossier D --port-pop3 P
+                                        : nœud de secours, POP3 en lecture seule
+                                          alimenté par la réplication
 """
 
+# Configuration du stockage
+DOSSIER_MAIL = 'Boîte_mail'
+COMPRESSION = None          # None, 'zlib' ou 'lzma'
+SEUIL_COMPRESSION = 512     # Taille minimale (octets) d'un corps compressé
+RACINES = []                # Dossiers (disques) où répartir les boîtes, [] = DOSSIER_MAIL
+NIVEAUX_REPARTITION = 2     # Niveaux de sous-dossiers par hachage (0 = fichiers plats)
+
+# Configuration du relais sortant ([] = tous les domaines sont locaux, pas de relais)
+DOMAINES_LOCAUX = []
+ROUTES_RELAIS = {}          # {domaine: (hôte, port)} des serveurs SMTP distants
+RELAIS_PAR_DEFAUT = None    # (hôte, port) pour les domaines sans route, ou None
+DOSSIER_FILE_SORTANTE = 'File_sortante'
+NB_TRAVAILLEURS_RELAIS = 4
+
+# Configuration de la réplication
+REPLICATION = False         # True : journal des modifications et serveur de réplication
+PORT_REPLICATION = 65435
+
+# Configuration des notifications (avis de nouveau message, remplace l'interrogation de STAT)
+PORT_NOTIFICATIONS = 65436
+
+# Configuration du profilage (activé à la demande : SIGUSR1 ou commande POP3 PROFIL)
+DOSSIER_PROFILS = 'Profils'
+
 def main():
-    # Initialise le stockage partagé
-    stockage = StockageMessage('Boîte_mail')
+    parser = argparse.ArgumentParser(description="Serveurs de messagerie SMTP / POP3")
+    parser.add_argument('--reequilibrer', action='store_true',
+                        help="Déplace les boîtes mail vers leur emplacement attendu puis quitte")
+    parser.add_argument('--ancienne-racine', action='append', dest='anciennes_racines', default=[],
+                        help="Racine retirée de RACINES dont les boîtes sont à déplacer (répétable)")
+    parser.add_argument('--dossier', default=DOSSIER_MAIL, help="Dossier principal des boîtes mail")
+    parser.add_argument('--port-smtp', type=int, default=65434)
+    parser.add_argument('--port-pop3', type=int, default=65433)
+    parser.add_argument('--port-notifications', type=int, default=PORT_NOTIFICATIONS)
+    parser.add_argument('--replication', action='store_true', default=REPLICATION,
+                        help="Nœud primaire : journal des modifications et serveur de réplication")
+    parser.add_argument('--replique-de', metavar='HOTE:PORT',
+                        help="Nœud de secours : réplique le primaire indiqué (POP3 en lecture seule)")
+    args = parser.parse_args()
+    replique = args.replique_de is not None
     
-    # Crée les instances des serveurs
-    serveur_smtp = ServeurSMTP(port=65434, stockage=stockage)
-    serveur_pop3 = ServeurPOP3(port=65433, stockage=stockage)
+    # Initialise le stockage partagé (RACINES ne concerne que le dossier configuré)
+    stockage = StockageMessage(args.dossier, compression=COMPRESSION,
+                               seuil_compression=SEUIL_COMPRESSION,
+                               racines=RACINES if args.dossier == DOSSIER_MAIL else None,
+                               niveaux_repartition=NIVEAUX_REPARTITION,
+                               journaliser=args.replication)
     
-    # Lance chaque serveur dans son propre thread
-    thread_smtp = threading.Thread(target=serveur_smtp.demarrer, name="ServeurSMTP")
-    thread_pop3 = threading.Thread(target=serveur_pop3.demarrer, name="ServeurPOP3")
+    if args.reequilibrer:
+        stockage.reequilibrer(args.anciennes_racines)
+        return
     
-    # Les threads daemon se terminent quand le programme principal s'arrête
-    thread_smtp.daemon = False
-    thread_pop3.daemon = False
+    # Profilage à la demande (kill -USR1 <pid> pour basculer)
+    profileur.dossier = DOSSIER_PROFILS
+    profileur.installer_signal()
+    
+    # File sortante pour les domaines non locaux
+    relais = None
+    if DOMAINES_LOCAUX and not replique:
+        relais = FileRelais(stockage, DOSSIER_FILE_SORTANTE, domaines_locaux=DOMAINES_LOCAUX,
+                            routes=ROUTES_RELAIS, route_defaut=RELAIS_PAR_DEFAUT,
+                            nb_travailleurs=NB_TRAVAILLEURS_RELAIS, domaine_local=DOMAINES_LOCAUX[0])
+        relais.demarrer()
+    
+    # Crée les instances des serveurs (une réplique ne reçoit pas de courrier)
+    serveurs = []
+    if not replique:
+        serveurs.append(ServeurSMTP(port=args.port_smtp, stockage=stockage, relais=relais))
+    serveurs.append(ServeurPOP3(port=args.port_pop3, stockage=stockage, lecture_seule=replique))
+    serveurs.append(ServeurNotifications(port=args.port_notifications, stockage=stockage))
+    if args.replication:
+        serveurs.append(ServeurReplication(port=PORT_REPLICATION, stockage=stockage))
+    
+    # Lance chaque serveur dans son propre thread (non daemon : fermeture propre)
+    threads = [threading.Thread(target=serveur.demarrer, name=f"Serveur{serveur.nom_protocole()}")
+               for serveur in serveurs]
+    
+    # Une réplique suit le primaire dans un thread dédié
+    client_replication = None
+    if replique:
+        hote, _, port = args.replique_de.rpartition(':')
+        client_replication = ClientReplication(stockage, hote, int(port))
+        threads.append(threading.Thread(target=client_replication.demarrer, name="Replication"))
     
     print("=" * 60)
     print("=== Serveurs de Messagerie - Démarrage ===")
     print("=" * 60)
-    print("SMTP : localhost:65434")
-    print("POP3 : localhost:65433")
+    if not replique:
+        print(f"SMTP : localhost:{args.port_smtp}")
+    print(f"POP3 : localhost:{args.port_pop3}" + (" (lecture seule)" if replique else ""))
+    print(f"Notifications : localhost:{args.port_notifications}")
+    if args.replication:
+        print(f"Réplication : localhost:{PORT_REPLICATION}")
+    if replique:
+        print(f"Réplique de : {args.replique_de}")
     print("(Appuyez sur Ctrl+C pour arrêter)\n")
     
     try:
-        thread_smtp.start()
-        thread_pop3.start()
+        for thread in threads:
+            thread.start()
         
         # Attend que les threads se terminent
-        thread_smtp.join()
-        thread_pop3.join()
+        for thread in threads:
+            thread.join()
     
     except KeyboardInterrupt:
         print("\n" + "=" * 60)
         print("Arrêt demandé. Fermeture des serveurs...")
         print("(Attente de la fin des clients en cours...)")
         print("=" * 60)
-        serveur_smtp.arreter()
-        serveur_pop3.arreter()
+        for serveur in serveurs:
+            serveur.arreter()
+        if client_replication is not None:
+            client_replication.arreter()
         
         # Attend que les threads serveurs finissent
         print("\nFermeture en cours...\n")
-        thread_smtp.join()
-        thread_pop3.join()
+        for thread in threads:
+            thread.join()
         
         print("\n" + "=" * 60)
-        print("** Serveur SMTP fermé **")
-        print("** Serveur POP3 fermé **")
+        for serveur in serveurs:
+            print(f"** Serveur {serveur.nom_protocole()} fermé **")
         print("=" * 60)
         print("\n À bientôt !\n")
+    
+    finally:
+        # Les messages non livrés restent dans la file sur disque
+        if relais is not None:
+            relais.arreter()
 
 if __name__ == "__main__":
     main()
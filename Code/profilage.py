@@ -0,0 +1,203 @@
+import cProfile
+import contextlib
+import io
+import os
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Profilage à la demande des sessions clientes (SMTP et POP3).
+
+Une fois activé, le profileur échantillonne les N prochaines sessions :
+    - cProfile sur le thread de la session : temps passé dans le découpage
+      des boîtes mail (_lire_boite_mail), l'attente du verrou du stockage
+      (StockageMessage._verrouiller, méthode acquire de _thread.lock) et les
+      sockets (recv, sendall)
+    - tracemalloc : allocations les plus importantes pendant la session
+Les résultats sont écrits dans un dossier (.prof lisible avec pstats, .txt résumé).
+Le profileur se désactive seul après N sessions. Depuis Python 3.12, cProfile ne
+peut suivre qu'une session à la fois : une session simultanée n'est pas profilée
+et ne compte pas parmi les N. Les sessions longues (réplication, notifications)
+ne sont jamais profilées.
+
+ACTIVATION :
+    - signal SIGUSR1 : bascule activé / désactivé (kill -USR1 <pid>)
+    - commande d'administration POP3 depuis la machine locale : PROFIL ON [n] | OFF | ETAT
+
+Désactivé, le coût se limite à la lecture d'un booléen par session.
+"""
+
+# Configuration par défaut
+DOSSIER_PROFILS = 'Profils'
+NB_SESSIONS = 10
+NB_LIGNES = 25            # Nombre de lignes des résumés (fonctions, allocations)
+PROFONDEUR_PILE = 10      # Nombre de cadres mémorisés par allocation (tracemalloc)
+
+class Profileur:
+    """Échantillonne des sessions avec cProfile et tracemalloc"""
+
+    def __init__(self, dossier=DOSSIER_PROFILS):
+        self.dossier = dossier
+        self.actif = False
+        self.sessions_restantes = 0
+        self.sessions_en_cours = 0
+        self.tracemalloc_demarre = False  # True si tracemalloc a été lancé par le profileur
+        self.generation = 0  # Incrémentée à chaque activation / désactivation
+        self.verrou = threading.Lock()
+
+    def activer(self, nb_sessions=NB_SESSIONS, dossier=None):
+        """Profile les nb_sessions prochaines sessions (au moins une)"""
+        if nb_sessions < 1:
+            raise ValueError(f"Nombre de sessions invalide: {nb_sessions}")
+        with self.verrou:
+            if dossier is not None:
+                self.dossier = dossier
+            os.makedirs(self.dossier, exist_ok=True)
+            self.sessions_restantes = nb_sessions
+            self.generation += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFONDEUR_PILE)
+                self.tracemalloc_demarre = True
+            self.actif = True
+        print(f"[Profilage] Activé pour {nb_sessions} session(s), résultats dans {self.dossier}")
+
+    def desactiver(self):
+        """Arrête l'échantillonnage (les sessions en cours terminent leur profil)"""
+        with self.verrou:
+            self.actif = False
+            self.sessions_restantes = 0
+            self.generation += 1
+            self._arreter_tracemalloc()
+        print("[Profilage] Désactivé")
+
+    def basculer(self):
+        """Active ou désactive le profileur"""
+        if self.actif:
+            self.desactiver()
+        else:
+            self.activer()
+
+    def etat(self):
+        """Retourne une description courte de l'état du profileur"""
+        with self.verrou:
+            if not self.actif:
+                return "inactif"
+            return (f"actif, {self.sessions_restantes} session(s) restante(s), "
+                    f"{self.sessions_en_cours} en cours, dossier {self.dossier}")
+
+    def _arreter_tracemalloc(self):
+        """Arrête tracemalloc si plus aucune session n'en a besoin (verrou détenu)"""
+        if self.tracemalloc_demarre and self.sessions_en_cours == 0 and not self.actif:
+            tracemalloc.stop()
+            self.tracemalloc_demarre = False
+
+    def _reserver_session(self):
+        """Retourne la génération de l'activation si la session doit être profilée, sinon None"""
+        with self.verrou:
+            if not self.actif or self.sessions_restantes <= 0:
+                return None
+            self.sessions_restantes -= 1
+            self.sessions_en_cours += 1
+            if self.sessions_restantes == 0:
+                self.actif = False
+            return self.generation
+
+    def _rendre_session(self, generation):
+        """Restitue une session réservée mais non profilée (sauf réactivation ou désactivation entre-temps)"""
+        with self.verrou:
+            self.sessions_en_cours -= 1
+            if generation == self.generation:
+                self.sessions_restantes += 1
+                self.actif = True
+            self._arreter_tracemalloc()
+
+    def _liberer_session(self):
+        with self.verrou:
+            self.sessions_en_cours -= 1
+            self._arreter_tracemalloc()
+            termine = not self.actif and self.sessions_en_cours == 0
+        if termine:
+            print("[Profilage] Échantillonnage terminé")
+
+    @contextlib.contextmanager
+    def session(self, nom):
+        """
+        Profile le bloc si le profileur est actif et qu'il reste des sessions à échantillonner
+
+        Args:
+            nom (str): Nom de la session, utilisé dans le nom des fichiers
+        """
+        generation = self._reserver_session() if self.actif else None
+        if generation is None:
+            yield
+            return
+
+        memoire_avant = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        profil = cProfile.Profile()
+        try:
+            profil.enable()
+        except ValueError as e:
+            # Python 3.12+ : un seul cProfile peut être actif à la fois dans le processus
+            print(f"[Profilage] Session {nom} non profilée: {e}")
+            profil = None
+        if profil is None:
+            # La session réservée est rendue : une session suivante sera échantillonnée
+            self._rendre_session(generation)
+            yield
+            return
+
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            profil.disable()
+            duree = time.perf_counter() - debut
+            memoire_apres = tracemalloc.take_snapshot() if memoire_avant is not None else None
+            try:
+                self._enregistrer(nom, profil, duree, memoire_avant, memoire_apres)
+            except OSError as e:
+                print(f"[Profilage] Erreur lors de l'écriture du profil: {e}")
+            finally:
+                self._liberer_session()
+
+    def _enregistrer(self, nom, profil, duree, memoire_avant, memoire_apres):
+        """Écrit le profil brut (.prof) et un résumé lisible (.txt)"""
+        horodatage = time.strftime('%Y%m%d-%H%M%S')
+        nom_fichier = "".join(c if c.isalnum() or c in '-_.' else '_' for c in nom)
+        base = os.path.join(self.dossier, f"{horodatage}_{threading.get_ident()}_{nom_fichier}")
+
+        profil.dump_stats(base + '.prof')
+
+        resume = io.StringIO()
+        resume.write(f"Session : {nom}\nDurée : {duree:.3f} s\n\n")
+        resume.write(f"=== Fonctions (temps cumulé, {NB_LIGNES} premières) ===\n")
+        pstats.Stats(profil, stream=resume).sort_stats('cumulative').print_stats(NB_LIGNES)
+
+        if memoire_apres is not None:
+            resume.write(f"\n=== Allocations pendant la session ({NB_LIGNES} premières) ===\n")
+            for statistique in memoire_apres.compare_to(memoire_avant, 'lineno')[:NB_LIGNES]:
+                resume.write(f"{statistique}\n")
+            resume.write(f"\n=== Plus gros allocateurs en fin de session ({NB_LIGNES} premiers) ===\n")
+            for statistique in memoire_apres.statistics('lineno')[:NB_LIGNES]:
+                resume.write(f"{statistique}\n")
+
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(resume.getvalue())
+        print(f"[Profilage] Profil enregistré : {base}.txt")
+
+    def installer_signal(self):
+        """Associe SIGUSR1 à la bascule du profileur (à appeler depuis le thread principal)"""
+        if not hasattr(signal, 'SIGUSR1'):
+            print("[Profilage] SIGUSR1 indisponible sur ce système, utiliser la commande PROFIL")
+            return
+        signal.signal(signal.SIGUSR1, lambda numero, cadre: self.basculer())
+
+# Profileur partagé par les serveurs
+profileur = Profileur()
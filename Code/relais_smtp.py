@@ -0,0 +1,301 @@
+import heapq
+import json
+import os
+import threading
+import time
+import uuid
+from client_messagerie import ClientSMTP, ErreurMessagerie, PoolConnexions
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+File d'attente sortante pour le relais des messages destinés à des domaines non locaux.
+
+FONCTIONNEMENT :
+    - ServeurSMTP dépose dans la file les messages dont le destinataire n'est pas local
+    - Chaque entrée est persistée (un fichier JSON par message) : la file survit à un redémarrage
+    - Un pool de threads livre les messages en parallèle aux serveurs SMTP distants
+    - Les connexions sont réutilisées par destination (un pool par serveur distant)
+    - Échec temporaire (4xx, erreur réseau) : nouvelle tentative avec délai exponentiel ;
+      une erreur réseau sur une connexion réutilisée (fermée par le serveur distant pendant
+      son inactivité) est d'abord retentée aussitôt sur une nouvelle connexion
+    - Toute autre erreur (réponse illisible...) est traitée comme un échec temporaire
+    - Échec définitif (5xx, aucune route, trop de tentatives) : avis de non-remise
+      renvoyé à l'expéditeur
+
+ROUTAGE :
+Sans résolution DNS, le serveur distant d'un domaine est donné par la table
+routes {domaine: (hôte, port)}, ou à défaut par route_defaut (relais amont).
+
+ESSAI : python essai_relais.py (serveur distant simulé : livraison, non-remise, nouvelles tentatives)
+"""
+
+EXPEDITEUR_NON_REMISE = "MAILER-DAEMON"
+
+class FileRelais:
+    """File sortante persistée et livrée par un pool de threads"""
+
+    def __init__(self, stockage, dossier='File_sortante', domaines_locaux=(), routes=None,
+                 route_defaut=None, nb_travailleurs=4, connexions_par_destination=2,
+                 delai_initial=30.0, delai_max=3600.0, max_tentatives=8, domaine_local='localhost'):
+        """
+        Args:
+            stockage (StockageMessage): Stockage local (avis de non-remise)
+            dossier (str): Dossier de persistance de la file
+            domaines_locaux (iterable): Domaines livrés localement
+            routes (dict): {domaine: (hôte, port)} des serveurs distants
+            route_defaut (tuple): (hôte, port) utilisé pour les domaines sans route
+            nb_travailleurs (int): Nombre de threads de livraison
+            connexions_par_destination (int): Connexions simultanées par serveur distant
+            delai_initial (float): Délai (s) avant la première nouvelle tentative
+            delai_max (float): Délai (s) maximal entre deux tentatives
+            max_tentatives (int): Nombre de tentatives avant non-remise
+            domaine_local (str): Domaine de l'expéditeur des avis de non-remise
+        """
+        self.stockage = stockage
+        self.dossier = dossier
+        self.domaines_locaux = {domaine.lower() for domaine in domaines_locaux}
+        self.routes = {domaine.lower(): route for domaine, route in (routes or {}).items()}
+        self.route_defaut = route_defaut
+        self.nb_travailleurs = nb_travailleurs
+        self.connexions_par_destination = connexions_par_destination
+        self.delai_initial = delai_initial
+        self.delai_max = delai_max
+        self.max_tentatives = max_tentatives
+        self.domaine_local = domaine_local
+
+        self.entrees = {}          # {id: entrée}
+        self.echeancier = []       # Tas de (date de prochaine tentative, id)
+        self.pools = {}            # {(hôte, port): PoolConnexions}
+        self.condition = threading.Condition()
+        self.en_execution = False
+        self.travailleurs = []
+
+        os.makedirs(self.dossier, exist_ok=True)
+        self._charger()
+
+    # ─── Routage ────────────────────────────────────────────────────────────
+
+    def est_locale(self, adresse):
+        """Retourne True si l'adresse appartient à un domaine local"""
+        return adresse.rpartition('@')[2].lower() in self.domaines_locaux
+
+    def _route(self, adresse):
+        """Retourne (hôte, port) du serveur distant d'une adresse, ou None"""
+        return self.routes.get(adresse.rpartition('@')[2].lower(), self.route_defaut)
+
+    # ─── Persistance ────────────────────────────────────────────────────────
+
+    def _chemin_entree(self, id_entree):
+        return os.path.join(self.dossier, f"{id_entree}.json")
+
+    def _persister(self, entree):
+        """Écrit une entrée de façon atomique"""
+        chemin = self._chemin_entree(entree['id'])
+        with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(entree, f, ensure_ascii=False)
+        os.replace(chemin + '.tmp', chemin)
+
+    def _supprimer(self, entree):
+        with self.condition:
+            self.entrees.pop(entree['id'], None)
+        try:
+            os.remove(self._chemin_entree(entree['id']))
+        except FileNotFoundError:
+            pass
+
+    def _charger(self):
+        """Recharge les entrées persistées (reprise après redémarrage)"""
+        for nom in os.listdir(self.dossier):
+            if not nom.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.dossier, nom), 'r', encoding='utf-8') as f:
+                    entree = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Relais] Entrée illisible {nom} ignorée: {e}")
+                continue
+            self.entrees[entree['id']] = entree
+            heapq.heappush(self.echeancier, (entree['prochaine_tentative'], entree['id']))
+        if self.entrees:
+            print(f"[Relais] {len(self.entrees)} message(s) en attente rechargé(s)")
+
+    # ─── File ───────────────────────────────────────────────────────────────
+
+    def ajouter(self, expediteur, destinataire, contenu_message):
+        """
+        Ajoute un message à la file sortante
+
+        Args:
+            expediteur (str): Adresse de l'expéditeur
+            destinataire (str): Adresse distante du destinataire
+            contenu_message (list): Liste des lignes du message
+        """
+        if destinataire is None or expediteur is None:
+            return False
+
+        entree = {
+            "id": uuid.uuid4().hex,
+            "expediteur": expediteur,
+            "destinataire": destinataire,
+            "contenu": list(contenu_message),
+            "tentatives": 0,
+            "prochaine_tentative": time.time(),
+            "derniere_erreur": None,
+        }
+        try:
+            self._persister(entree)
+        except OSError as e:
+            print(f"[Relais] Erreur lors de la mise en file: {e}")
+            return False
+
+        with self.condition:
+            self.entrees[entree['id']] = entree
+            heapq.heappush(self.echeancier, (entree['prochaine_tentative'], entree['id']))
+            self.condition.notify()
+        print(f"[Relais] Message pour {destinataire} mis en file")
+        return True
+
+    def taille(self):
+        """Retourne le nombre de messages en attente"""
+        with self.condition:
+            return len(self.entrees)
+
+    # ─── Livraison ──────────────────────────────────────────────────────────
+
+    def demarrer(self):
+        """Lance les threads de livraison"""
+        self.en_execution = True
+        for numero in range(self.nb_travailleurs):
+            thread = threading.Thread(target=self._boucle_livraison, name=f"Relais-{numero + 1}")
+            thread.start()
+            self.travailleurs.append(thread)
+        print(f"[Relais] File sortante démarrée ({self.nb_travailleurs} travailleurs)")
+
+    def arreter(self):
+        """Arrête les livraisons ; les messages restants sont conservés sur disque"""
+        with self.condition:
+            if not self.en_execution:
+                return
+            self.en_execution = False
+            self.condition.notify_all()
+        for thread in self.travailleurs:
+            thread.join()
+        self.travailleurs = []
+        for pool in self.pools.values():
+            pool.fermer()
+        print("[Relais] File sortante arrêtée")
+
+    def _prochaine_entree(self):
+        """Attend et retourne la prochaine entrée échue, ou None à l'arrêt"""
+        with self.condition:
+            while self.en_execution:
+                if self.echeancier:
+                    echeance, id_entree = self.echeancier[0]
+                    if id_entree not in self.entrees:
+                        heapq.heappop(self.echeancier)  # Entrée déjà traitée
+                        continue
+                    attente = echeance - time.time()
+                    if attente <= 0:
+                        heapq.heappop(self.echeancier)
+                        return self.entrees[id_entree]
+                    self.condition.wait(attente)
+                else:
+                    self.condition.wait()
+            return None
+
+    def _boucle_livraison(self):
+        while True:
+            entree = self._prochaine_entree()
+            if entree is None:
+                return
+            self._livrer(entree)
+
+    def _pool(self, route):
+        """Retourne le pool de connexions d'un serveur distant"""
+        with self.condition:
+            if route not in self.pools:
+                hote, port = route
+                self.pools[route] = PoolConnexions(lambda: ClientSMTP(hote, port),
+                                                   taille_max=self.connexions_par_destination)
+            return self.pools[route]
+
+    def _livrer(self, entree):
+        """Tente de livrer une entrée au serveur distant"""
+        route = self._route(entree['destinataire'])
+        if route is None:
+            self._non_remise(entree, "Aucune route vers le domaine du destinataire")
+            return
+
+        # Une connexion du pool a pu être fermée par le serveur distant pendant son
+        # inactivité : une erreur réseau est retentée une fois sur une nouvelle connexion
+        for neuve in (False, True):
+            try:
+                with self._pool(route).connexion(neuve=neuve) as client:
+                    client.envoyer(entree['expediteur'], entree['destinataire'], entree['contenu'])
+                break
+            except ErreurMessagerie as e:
+                if e.reponse.startswith("5"):
+                    self._non_remise(entree, e.reponse)
+                else:
+                    self._replanifier(entree, e.reponse)
+                return
+            except OSError as e:
+                if neuve:
+                    self._replanifier(entree, str(e))
+                    return
+            except Exception as e:
+                # Réponse illisible, etc. : le travailleur survit et l'entrée reste planifiée
+                self._replanifier(entree, f"{type(e).__name__}: {e}")
+                return
+
+        print(f"[Relais] Message pour {entree['destinataire']} livré à {route[0]}:{route[1]}")
+        self._supprimer(entree)
+
+    def _replanifier(self, entree, erreur):
+        """Planifie une nouvelle tentative avec un délai exponentiel"""
+        entree['tentatives'] += 1
+        entree['derniere_erreur'] = erreur
+        if entree['tentatives'] >= self.max_tentatives:
+            self._non_remise(entree, f"Abandon après {entree['tentatives']} tentatives : {erreur}")
+            return
+
+        delai = min(self.delai_initial * 2 ** (entree['tentatives'] - 1), self.delai_max)
+        entree['prochaine_tentative'] = time.time() + delai
+        try:
+            self._persister(entree)
+        except OSError as e:
+            print(f"[Relais] Erreur lors de la mise à jour de la file: {e}")
+
+        with self.condition:
+            heapq.heappush(self.echeancier, (entree['prochaine_tentative'], entree['id']))
+            self.condition.notify()
+        print(f"[Relais] Échec temporaire pour {entree['destinataire']} ({erreur}), "
+              f"nouvelle tentative dans {delai:.0f} s")
+
+    def _non_remise(self, entree, raison):
+        """Retire l'entrée de la file et renvoie un avis de non-remise à l'expéditeur"""
+        self._supprimer(entree)
+        print(f"[Relais] Non-remise pour {entree['destinataire']}: {raison}")
+
+        expediteur = entree['expediteur']
+        # Jamais d'avis de non-remise en réponse à un avis de non-remise (boucle)
+        if expediteur.upper().startswith(EXPEDITEUR_NON_REMISE):
+            return
+
+        avis = [
+            "Votre message n'a pas pu être remis.",
+            f"Destinataire : {entree['destinataire']}",
+            f"Raison : {raison}",
+            f"Tentatives : {entree['tentatives']}",
+            "",
+            "--- Message d'origine ---",
+        ] + entree['contenu']
+        emetteur = f"{EXPEDITEUR_NON_REMISE}@{self.domaine_local}"
+
+        if self.est_locale(expediteur):
+            self.stockage.sauvegarder_message(emetteur, expediteur, avis)
+        else:
+            self.ajouter(emetteur, expediteur, avis)
@@ -0,0 +1,206 @@
+import json
+import os
+import socket
+import time
+from serveur_messagerie import ServeurMessagerie
+
+"""
+Auteurs: Bohy, Abbadi, Cherraf
+Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
+
+DESCRIPTION :
+Réplication des boîtes mail vers un nœud de secours à partir du journal
+des modifications du stockage (StockageMessage avec journaliser=True).
+
+PROTOCOLE (port 65435 par défaut) :
+    Réplique -> Primaire : "SYNC <offset>"
+    Primaire -> Réplique : "+OK <taille du journal>" (ou "-ERR ...")
+    Primaire -> Réplique : lignes JSON du journal à partir de l'offset,
+                           puis les nouvelles modifications au fil de l'eau.
+                           Une ligne vide sert de battement de coeur.
+
+La réplique mémorise l'offset de la dernière modification appliquée dans un
+fichier : après une déconnexion, elle reprend exactement à cet endroit.
+Une modification qui échoue (erreur disque...) n'avance pas l'offset : la réplique
+se reconnecte et la redemande.
+Une modification appliquée juste avant un arrêt brutal, sans que l'offset ait
+pu être enregistré, est renvoyée à la reprise : la première entrée reçue est
+comparée au nombre de messages de la boîte et ignorée si elle est déjà appliquée.
+
+ÉTAT INITIAL :
+Le journal créé au premier démarrage avec --replication commence par le courrier
+déjà présent (voir StockageMessage) : une nouvelle réplique part d'un dossier vide
+et reçoit toutes les boîtes, avec les mêmes numéros de message que le primaire.
+
+ESSAI AVEC DEUX PROCESSUS :
+    python principal.py --replication
+    python principal.py --replique-de localhost:65435 --dossier Boîte_mail_replique --port-pop3 65443
+"""
+
+BATTEMENT = 2.0           # Secondes sans modification avant un battement de coeur
+DELAI_RECEPTION = 10.0    # Secondes sans données avant de considérer le primaire perdu
+FICHIER_OFFSET = 'offset_replication'
+
+class ErreurReplication(Exception):
+    """Modification du journal que la réplique n'a pas pu appliquer"""
+
+class ServeurReplication(ServeurMessagerie):
+    """Serveur du nœud primaire : diffuse le journal des modifications"""
+
+    profilable = False  # Sessions sans fin : jamais échantillonnées par le profileur
+
+    def nom_protocole(self):
+        return "REPL"
+
+    def gerer_client(self, socket_client, adresse_client):
+        """
+        Envoie le journal à une réplique à partir de l'offset demandé, puis la suit
+
+        Args:
+            socket_client: Socket connectée à la réplique
+            adresse_client: Tuple (IP, port) de la réplique
+        """
+        print(f"[REPL] Réplique connectée depuis {adresse_client}")
+
+        with socket_client:
+            try:
+                lignes = self._lire_lignes(socket_client)
+                parties = next(lignes, "").split()
+                if len(parties) != 2 or parties[0].upper() != "SYNC" or not parties[1].isdigit():
+                    socket_client.sendall("-ERR Erreur syntaxe. Format: SYNC offset\r\n".encode('utf-8'))
+                    return
+
+                offset = int(parties[1])
+                if self.stockage.journal_modifications is None:
+                    socket_client.sendall("-ERR Journal des modifications désactivé\r\n".encode('utf-8'))
+                    return
+                if offset > self.stockage.taille_journal:
+                    socket_client.sendall("-ERR Offset au-delà de la fin du journal\r\n".encode('utf-8'))
+                    return
+
+                socket_client.sendall(f"+OK {self.stockage.taille_journal}\r\n".encode('utf-8'))
+                print(f"[REPL] Envoi du journal à {adresse_client} depuis l'offset {offset}")
+
+                while self.en_execution:
+                    donnees = self.stockage.lire_journal(offset)
+                    if donnees:
+                        socket_client.sendall(donnees)
+                        offset += len(donnees)
+                        continue
+
+                    # Attend une nouvelle modification ; sans nouveauté, envoie un battement
+                    if self.stockage.attendre_modification(offset, BATTEMENT) <= offset:
+                        socket_client.sendall(b"\n")
+
+            except OSError as e:
+                print(f"[REPL] Réplique {adresse_client} déconnectée: {e}")
+
+class ClientReplication:
+    """Nœud de secours : suit le journal du primaire et l'applique au stockage local"""
+
+    def __init__(self, stockage, hote, port=65435, delai_reconnexion=1.0, delai_max=30.0):
+        """
+        Args:
+            stockage (StockageMessage): Stockage local de la réplique
+            hote (str): Adresse du primaire
+            port (int): Port de réplication du primaire
+            delai_reconnexion (float): Délai initial (s) avant une reconnexion
+            delai_max (float): Délai maximal (s) entre deux reconnexions
+        """
+        self.stockage = stockage
+        self.hote = hote
+        self.port = port
+        self.delai_reconnexion = delai_reconnexion
+        self.delai_max = delai_max
+        self.chemin_offset = os.path.join(stockage.dossier_mail, FICHIER_OFFSET)
+        self.offset = self._charger_offset()
+        self.en_execution = False
+        self.socket = None
+        self.verifier_doublon = True  # La première entrée reçue a peut-être déjà été appliquée
+
+        if self.offset == 0 and stockage.lister_adresses():
+            print("[Réplique] Attention : le dossier de la réplique contient déjà des boîtes mail, "
+                  "elles seront mélangées au courrier du primaire")
+
+    def _charger_offset(self):
+        try:
+            with open(self.chemin_offset, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _enregistrer_offset(self):
+        with open(self.chemin_offset + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(str(self.offset))
+        os.replace(self.chemin_offset + '.tmp', self.chemin_offset)
+
+    def demarrer(self):
+        """Boucle de réplication : se reconnecte au primaire tant qu'elle n'est pas arrêtée"""
+        self.en_execution = True
+        delai = self.delai_reconnexion
+        print(f"[Réplique] Réplication depuis {self.hote}:{self.port}, offset {self.offset}")
+
+        while self.en_execution:
+            try:
+                self._suivre_journal()
+                delai = self.delai_reconnexion
+            except (OSError, ValueError, ErreurReplication) as e:
+                if self.en_execution:
+                    print(f"[Réplique] Connexion au primaire perdue ({e}), nouvelle tentative dans {delai:.0f} s")
+            finally:
+                self.socket = None
+
+            # Attente avant reconnexion, interrompue par arreter()
+            fin = time.time() + delai
+            while self.en_execution and time.time() < fin:
+                time.sleep(0.2)
+            delai = min(delai * 2, self.delai_max)
+
+        print("[Réplique] Réplication arrêtée")
+
+    def _suivre_journal(self):
+        """Se connecte, demande le journal depuis l'offset et applique chaque modification"""
+        with socket.create_connection((self.hote, self.port), timeout=DELAI_RECEPTION) as connexion:
+            self.socket = connexion
+            connexion.sendall(f"SYNC {self.offset}\r\n".encode('utf-8'))
+            self.verifier_doublon = True
+
+            tampon = b""
+            while b"\r\n" not in tampon:
+                donnees = connexion.recv(4096)
+                if not donnees:
+                    raise ConnectionError("Connexion fermée par le primaire")
+                tampon += donnees
+            reponse, tampon = tampon.split(b"\r\n", 1)
+            reponse = reponse.decode('utf-8')
+            if not reponse.startswith("+OK"):
+                raise ConnectionError(f"Refus du primaire: {reponse}")
+            print(f"[Réplique] Connecté au primaire (journal : {reponse[4:]} octets)")
+
+            while self.en_execution:
+                *lignes, tampon = tampon.split(b"\n")
+                for ligne in lignes:
+                    self._appliquer(ligne)
+                donnees = connexion.recv(65536)
+                if not donnees:
+                    raise ConnectionError("Connexion fermée par le primaire")
+                tampon += donnees
+
+    def _appliquer(self, ligne):
+        """Applique une ligne du journal puis avance l'offset (inchangé en cas d'échec)"""
+        if ligne.strip():
+            if not self.stockage.appliquer_modification(json.loads(ligne), self.verifier_doublon):
+                # L'offset n'avance pas : la modification est redemandée à la reconnexion
+                raise ErreurReplication(f"Échec de l'application de la modification à l'offset {self.offset}")
+            self.verifier_doublon = False
+            self.offset += len(ligne) + 1
+            self._enregistrer_offset()
+
+    def arreter(self):
+        """Arrête la réplication"""
+        self.en_execution = False
+        if self.socket is not None:
+            try:
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
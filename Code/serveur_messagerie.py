@@ -1,6 +1,7 @@
 import socket
 import threading
 from abc import ABC, abstractmethod
+from profilage import profileur
 
 """
 Auteurs: Bohy, Abbadi, Cherraf 
@@ -24,11 +25,18 @@ ARCHITECTURE DES THREADS :
 Chaque serveur écoute sur son propre port dans un thread dédié.
 Chaque client qui se connecte est géré dans son propre thread, 
 permettant plusieurs connexions simultanées sans blocage.
+
+Chaque session passe par le profileur partagé (voir profilage.py), qui ne
+fait rien tant qu'il n'a pas été activé, sauf pour les serveurs non profilables.
 """
 
 class ServeurMessagerie(ABC):
     """Classe de base abstraite pour les serveurs SMTP et POP3"""
     
+    # False pour les serveurs aux sessions sans fin (réplication, notifications) :
+    # un profil ne serait jamais écrit et bloquerait le profileur
+    profilable = True
+    
     def __init__(self, port, stockage):
         """
         Initialise le serveur
@@ -74,7 +82,7 @@ class ServeurMessagerie(ABC):
                 
                 # Crée un thread pour gérer ce client
                 thread_client = threading.Thread(
-                    target=self.gerer_client,
+                    target=self._gerer_client_profile,
                     args=(socket_client, adresse_client),
                     daemon=False  # Ne pas terminer immédiatement
                 )
@@ -87,6 +95,14 @@ class ServeurMessagerie(ABC):
                 if self.en_execution:
                     print(f"[{self.nom_protocole()}] Erreur lors de l'acceptation: {e}")
     
+    def _gerer_client_profile(self, socket_client, adresse_client):
+        """Gère un client, en profilant la session si le profilage est actif"""
+        if not self.profilable:
+            self.gerer_client(socket_client, adresse_client)
+            return
+        with profileur.session(f"{self.nom_protocole()}_{adresse_client[0]}_{adresse_client[1]}"):
+            self.gerer_client(socket_client, adresse_client)
+    
     def arreter(self):
         """Arrête le serveur et attend que les clients finissent"""
         if self.deja_arrête:
@@ -106,6 +122,31 @@ class ServeurMessagerie(ABC):
         
         print(f"[{self.nom_protocole()}] Serveur arrêté")
     
+    def _lire_lignes(self, socket_client):
+        """
+        Générateur des lignes reçues d'un client (sans le CRLF final)
+        
+        Les données sont mises en tampon : plusieurs commandes reçues d'un coup
+        (pipelining) sont traitées une à une, et une ligne coupée entre deux
+        recv() est reconstituée. Si un délai d'attente est défini sur la socket,
+        le générateur se termine à l'arrêt du serveur.
+        """
+        tampon = b""
+        while True:
+            try:
+                donnees_brutes = socket_client.recv(4096)
+            except socket.timeout:
+                # Socket avec délai d'attente : permet de vérifier l'arrêt du serveur
+                if not self.en_execution:
+                    return
+                continue
+            if not donnees_brutes:
+                return
+            tampon += donnees_brutes
+            *lignes, tampon = tampon.split(b"\n")
+            for ligne in lignes:
+                yield ligne.rstrip(b"\r").decode('utf-8')
+    
     @abstractmethod
     def nom_protocole(self):
         """Retourne le nom du protocole (à implémenter par les sous-classes)"""
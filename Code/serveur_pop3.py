@@ -1,4 +1,5 @@
 import threading
+from profilage import profileur
 from serveur_messagerie import ServeurMessagerie
 
 """
@@ -8,12 +9,27 @@ Promotion: M1 STRI     Date  : Janvier 2026       Version : 3.0
 DESCRIPTION :
 Implémentation du serveur POP3 (Post Office Protocol).
 Gère la consultation et la récupération des messages.
+Extension SEARCH : recherche plein texte côté serveur via l'index du stockage.
+Extension CAPA : liste les capacités (PIPELINING, SEARCH) ; les commandes étant
+lues ligne par ligne, un client peut en envoyer plusieurs sans attendre les réponses.
+Commande DELE : suppression immédiate d'un message (refusée sur une réplique en lecture seule).
+Commande d'administration PROFIL (depuis la machine locale uniquement) : pilote le profilage.
 Chaque client reçoit son propre thread pour la communication.
 """
 
 class ServeurPOP3(ServeurMessagerie):
     """Serveur POP3 - Consultation des messages"""
     
+    def __init__(self, port, stockage, lecture_seule=False):
+        """
+        Args:
+            port (int): Port d'écoute
+            stockage (StockageMessage): Instance du gestionnaire de stockage
+            lecture_seule (bool): Refuse les suppressions (réplique)
+        """
+        super().__init__(port, stockage)
+        self.lecture_seule = lecture_seule
+    
     def nom_protocole(self):
         return "POP3"
     
@@ -32,24 +48,18 @@ class ServeurPOP3(ServeurMessagerie):
             # Envoie le message de bienvenue
             socket_client.sendall(b"+OK Service Ready\r\n")
             
-            connexion_active = True
-            
-            while connexion_active:
-                try:
-                    # Reçoit les données du client
-                    donnees_brutes = socket_client.recv(1024)
-                    if not donnees_brutes:
-                        break
-                    
-                    commande = donnees_brutes.decode('utf-8').strip()
+            try:
+                # Reçoit les données du client, une ligne à la fois
+                for ligne in self._lire_lignes(socket_client):
+                    commande = ligne.strip()
                     print(f"[POP3] [{adresse_client}] Reçu: {commande}")
                     
                     # Traite la commande
-                    connexion_active = self.traiter_commandes(commande, socket_client)
-                
-                except Exception as e:
-                    print(f"[POP3] Erreur: {e}")
-                    break
+                    if not self.traiter_commandes(commande, socket_client):
+                        break
+            
+            except Exception as e:
+                print(f"[POP3] Erreur: {e}")
     
     def traiter_commandes(self, commande, socket_client):
         """
@@ -70,6 +80,10 @@ class ServeurPOP3(ServeurMessagerie):
                 socket_client.sendall("+OK Fermeture connexion\r\n".encode('utf-8'))
                 return False
             
+            case "CAPA":
+                # Réponse multi-lignes terminée par un point
+                socket_client.sendall("+OK Liste des capacités\r\nPIPELINING\r\nSEARCH\r\n.\r\n".encode('utf-8'))
+            
             case "STAT":
                 self.traiter_stat(commande, socket_client)
             
@@ -79,6 +93,15 @@ class ServeurPOP3(ServeurMessagerie):
             case "RETR":
                 self.traiter_retr(commande, socket_client)
             
+            case "DELE":
+                self.traiter_dele(commande, socket_client)
+            
+            case "SEARCH":
+                self.traiter_search(commande, socket_client)
+            
+            case "PROFIL":
+                self.traiter_profil(commande, socket_client)
+            
             case _:
                 socket_client.sendall("-ERR Commande non implémentée\r\n".encode('utf-8'))
         
@@ -145,3 +168,78 @@ class ServeurPOP3(ServeurMessagerie):
         else:
             message = self.stockage.obtenir_message(boite_mail, id_message)
             socket_client.sendall(f"+OK {message}\r\n".encode('utf-8'))
+    
+    def traiter_dele(self, commande, socket_client):
+        """
+        Traite la commande DELE
+        Format: DELE indice email@domain.com
+        Les messages suivants sont renumérotés.
+        """
+        parties = commande.split()
+        if len(parties) < 3 or not parties[1].isdigit():
+            socket_client.sendall("-ERR Erreur syntaxe. Format: DELE indice email@domain.com\r\n".encode('utf-8'))
+            return
+        
+        if self.lecture_seule:
+            socket_client.sendall("-ERR Serveur en lecture seule (réplique)\r\n".encode('utf-8'))
+            return
+        
+        id_message = int(parties[1])
+        adresse_mail = parties[2]
+        boite_mail = self.stockage.charger_boite_mail(adresse_mail)
+        
+        if boite_mail is None:
+            socket_client.sendall("-ERR Boîte mail inexistante\r\n".encode('utf-8'))
+        elif not self.stockage.valider_id_message(id_message, boite_mail):
+            socket_client.sendall("-ERR ID message inexistant\r\n".encode('utf-8'))
+        elif self.stockage.supprimer_message(adresse_mail, id_message):
+            socket_client.sendall(f"+OK Message {id_message} supprimé\r\n".encode('utf-8'))
+        else:
+            socket_client.sendall("-ERR Suppression impossible\r\n".encode('utf-8'))
+    
+    def traiter_search(self, commande, socket_client):
+        """
+        Traite la commande SEARCH (extension)
+        Format: SEARCH terme [terme ...] email@domain.com
+        Un terme est un mot du corps, "de:<adresse>" ou "pour:<adresse>".
+        Répond avec la liste des ID des messages contenant tous les termes.
+        """
+        parties = commande.split()
+        if len(parties) < 3:
+            socket_client.sendall("-ERR Erreur syntaxe. Format: SEARCH terme [terme ...] email@domain.com\r\n".encode('utf-8'))
+            return
+        
+        adresse_mail = parties[-1]
+        resultats = self.stockage.rechercher(adresse_mail, parties[1:-1])
+        
+        if resultats is None:
+            socket_client.sendall("-ERR Boîte mail inexistante\r\n".encode('utf-8'))
+        else:
+            # Format: [ID, ...]
+            socket_client.sendall(f"+OK {resultats}\r\n".encode('utf-8'))
+    
+    def traiter_profil(self, commande, socket_client):
+        """
+        Traite la commande d'administration PROFIL (clients locaux uniquement)
+        Format: PROFIL ON [nombre_sessions] | PROFIL OFF | PROFIL ETAT
+        """
+        if socket_client.getpeername()[0] not in ('127.0.0.1', '::1'):
+            socket_client.sendall("-ERR Commande réservée à l'administration locale\r\n".encode('utf-8'))
+            return
+        
+        parties = commande.upper().split()
+        action = parties[1] if len(parties) > 1 else "ETAT"
+        
+        if action == "ON" and (len(parties) < 3 or (parties[2].isdigit() and int(parties[2]) >= 1)):
+            if len(parties) > 2:
+                profileur.activer(int(parties[2]))
+            else:
+                profileur.activer()
+            socket_client.sendall(f"+OK Profilage {profileur.etat()}\r\n".encode('utf-8'))
+        elif action == "OFF":
+            profileur.desactiver()
+            socket_client.sendall("+OK Profilage désactivé\r\n".encode('utf-8'))
+        elif action == "ETAT":
+            socket_client.sendall(f"+OK Profilage {profileur.etat()}\r\n".encode('utf-8'))
+        else:
+            socket_client.sendall("-ERR Erreur syntaxe. Format: PROFIL ON [n] | OFF | ETAT\r\n".encode('utf-8'))
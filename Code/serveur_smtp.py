@@ -9,11 +9,28 @@ DESCRIPTION :
 Implémentation du serveur SMTP (Simple Mail Transfer Protocol).
 Gère la réception et la sauvegarde des messages.
 Chaque client reçoit son propre thread pour la communication.
+
+EHLO annonce l'extension PIPELINING : les commandes sont lues ligne par ligne,
+un client peut donc envoyer MAIL FROM, RCPT TO et DATA sans attendre les réponses.
+En mode DATA, un point en début de ligne doublé par le client est retiré.
+
+Si une file de relais est fournie, les messages dont le destinataire n'appartient
+pas à un domaine local y sont déposés au lieu d'être stockés (voir relais_smtp.py).
 """
 
 class ServeurSMTP(ServeurMessagerie):
     """Serveur SMTP - Réception de messages"""
     
+    def __init__(self, port, stockage, relais=None):
+        """
+        Args:
+            port (int): Port d'écoute
+            stockage (StockageMessage): Instance du gestionnaire de stockage
+            relais (FileRelais): File sortante pour les destinataires distants (optionnelle)
+        """
+        super().__init__(port, stockage)
+        self.relais = relais
+    
     def nom_protocole(self):
         return "SMTP"
     
@@ -39,14 +56,10 @@ class ServeurSMTP(ServeurMessagerie):
             contenu_message = []
             connexion_active = True
             
-            while connexion_active:
-                try:
-                    # Reçoit les données du client
-                    donnees_brutes = socket_client.recv(1024)
-                    if not donnees_brutes:
-                        break
-                    
-                    commande = donnees_brutes.decode('utf-8').strip()
+            try:
+                # Reçoit les données du client, une ligne à la fois
+                for ligne in self._lire_lignes(socket_client):
+                    commande = ligne if mode_data else ligne.strip()
                     
                     # Affiche la commande (sauf le point '.' de fin de DATA)
                     if commande != ".":
@@ -65,20 +78,28 @@ class ServeurSMTP(ServeurMessagerie):
                             socket_client.sendall("250 OK\r\n".encode('utf-8'))
                             mode_data = False
                             
-                            # Sauvegarde le message
-                            self.stockage.sauvegarder_message(expediteur, destinataire, contenu_message)
+                            # Sauvegarde le message, ou le relaie si le destinataire est distant
+                            if self.relais is not None and destinataire is not None \
+                                    and not self.relais.est_locale(destinataire):
+                                self.relais.ajouter(expediteur, destinataire, contenu_message)
+                            else:
+                                self.stockage.sauvegarder_message(expediteur, destinataire, contenu_message)
                             
                             # Réinitialise pour le prochain message
                             contenu_message = []
                             expediteur = None
                             destinataire = None
                         else:
-                            # Ajoute la ligne au contenu
+                            # Ajoute la ligne au contenu (retire le point de transparence)
+                            if commande.startswith(".."):
+                                commande = commande[1:]
                             contenu_message.append(commande)
-                
-                except Exception as e:
-                    print(f"[SMTP] Erreur: {e}")
-                    break
+                    
+                    if not connexion_active:
+                        break
+            
+            except Exception as e:
+                print(f"[SMTP] Erreur: {e}")
     
     def _traiter_commandes(self, commande, socket_client, expediteur, destinataire, 
                           mode_data, contenu_message):
@@ -97,7 +118,8 @@ class ServeurSMTP(ServeurMessagerie):
         
         match cmd:
             case "EHLO":
-                socket_client.sendall("502 Commande non implémentée\r\n".encode('utf-8'))
+                # Réponse multi-lignes : la dernière ligne utilise un espace après le code
+                socket_client.sendall("250-Bonjour\r\n250 PIPELINING\r\n".encode('utf-8'))
             
             case "HELO":
                 socket_client.sendall("250 Ok\r\n".encode('utf-8'))
@@ -1,5 +1,13 @@
+import base64
+import contextlib
+import hashlib
+import json
+import lzma
 import os
+import shutil
 import threading
+import zlib
+from index_recherche import IndexRecherche, extraire_termes, normaliser_requete
 
 """
 Auteurs: Bohy, Abbadi, Cherraf 
@@ -9,24 +17,317 @@ DESCRIPTION :
 Couche de stockage centralisée pour SMTP et POP3.
 Gère la sauvegarde et le chargement des messages indépendamment du protocole.
 Thread-safe grâce à un verrou (Lock) pour éviter les accès simultanés à la boîte mail.
+
+COMPRESSION (optionnelle) :
+Le corps des messages dont la taille dépasse un seuil peut être compressé
+(zlib ou lzma) puis encodé en base64. Les métadonnées (De:, Pour:) restent
+lisibles en clair et une ligne "Compression: <algo>" signale le format.
+La décompression est transparente au chargement (STAT, LIST, RETR).
+Un corps compressé corrompu ne rend illisible que son message, remplacé au
+chargement par un avis : les autres messages et leur numérotation sont conservés.
+
+RECHERCHE :
+Un index inversé (voir index_recherche.py) est mis à jour à chaque sauvegarde
+et persisté dans le dossier de stockage. Il est reconstruit s'il est absent.
+
+RÉPARTITION (optionnelle) :
+Avec niveaux_repartition > 0, chaque boîte est rangée dans des sous-dossiers
+issus du hachage SHA-1 de l'adresse (ex. 3f/a2/bob@example.com.txt), pour garder
+des répertoires de taille raisonnable. Plusieurs racines (disques) peuvent être
+fournies : la racine d'une adresse est choisie par hachage de rendez-vous, ce qui
+ne déplace qu'une fraction des boîtes lors de l'ajout d'une racine.
+Les boîtes à l'ancien emplacement (fichier plat) restent trouvées ;
+reequilibrer() les range à leur emplacement attendu.
+
+JOURNAL DES MODIFICATIONS (optionnel) :
+Avec journaliser=True, chaque livraison et suppression est ajoutée (une ligne JSON)
+au journal journal_modifications.jsonl. La position en octets dans ce journal sert
+d'offset de réplication : une réplique (voir replication.py) lit le journal à partir
+de son dernier offset et rejoue les modifications avec appliquer_modification().
+Un nouveau journal commence par une livraison pour chaque message déjà présent :
+une réplique partant de l'offset 0 reçoit donc aussi le courrier existant.
+Chaque entrée porte le nombre de messages de la boîte après la modification,
+ce qui permet de reconnaître une modification déjà appliquée.
+
+NOTIFICATIONS :
+Les fonctions enregistrées avec ajouter_observateur() sont appelées après chaque
+livraison (voir notifications.py, qui pousse les avis "nouveau message" aux abonnés).
 """
 
+SEPARATEUR = "=" * 50
+FICHIER_INDEX = 'index_recherche.jsonl'
+FICHIER_JOURNAL = 'journal_modifications.jsonl'
+TAILLE_LECTURE_JOURNAL = 1024 * 1024  # Taille maximale d'une lecture du journal
+LARGEUR_BASE64 = 76  # Longueur des lignes du corps compressé
+
+# Algorithmes disponibles : nom -> (compresser, décompresser)
+ALGORITHMES_COMPRESSION = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+# Erreurs d'un corps compressé corrompu : algorithme inconnu, base64 ou données invalides
+ERREURS_DECOMPRESSION = (KeyError, ValueError, zlib.error, lzma.LZMAError)
+
 class StockageMessage:
     """Gère le stockage et la récupération des messages"""
     
-    def __init__(self, dossier_mail='Boîte_mail'):
+    def __init__(self, dossier_mail='Boîte_mail', compression=None, seuil_compression=512,
+                 indexer=True, racines=None, niveaux_repartition=0, journaliser=False):
+        """
+        Args:
+            dossier_mail (str): Dossier principal (boîtes mail et index)
+            compression (str): None, 'zlib' ou 'lzma'
+            seuil_compression (int): Taille minimale (octets) d'un corps à compresser
+            indexer (bool): Maintient l'index de recherche plein texte
+            racines (list): Dossiers où répartir les boîtes (par défaut : dossier_mail)
+            niveaux_repartition (int): Nombre de niveaux de sous-dossiers (0 = fichiers plats)
+            journaliser (bool): Tient le journal des modifications (réplication)
+        """
+        if compression is not None and compression not in ALGORITHMES_COMPRESSION:
+            raise ValueError(f"Compression inconnue: {compression}")
+        
         self.dossier_mail = dossier_mail
+        self.racines = list(racines) if racines else [dossier_mail]
+        self.niveaux_repartition = niveaux_repartition
+        self.compression = compression
+        self.seuil_compression = seuil_compression
         self.verrou = threading.Lock()  # Verrou pour la thread-safety
+        self.nouvelle_modification = threading.Condition(self.verrou)
+        self.observateurs = []  # Fonctions appelées après chaque livraison
         self._initialiser_dossier()
+        
+        self.journal_modifications = None
+        self.taille_journal = 0
+        if journaliser:
+            self.journal_modifications = os.path.join(dossier_mail, FICHIER_JOURNAL)
+            if not os.path.exists(self.journal_modifications):
+                self._initialiser_journal()
+            self._ouvrir_journal()
+        
+        self.index = None
+        if indexer:
+            self.index = IndexRecherche(os.path.join(dossier_mail, FICHIER_INDEX))
+            if not self.index.charger():
+                self.reconstruire_index()
     
     def _initialiser_dossier(self):
-        """Crée le dossier de stockage s'il n'existe pas"""
-        if not os.path.exists(self.dossier_mail):
-            os.makedirs(self.dossier_mail)
+        """Crée les dossiers de stockage s'ils n'existent pas"""
+        for dossier in [self.dossier_mail] + self.racines:
+            if not os.path.exists(dossier):
+                os.makedirs(dossier)
+    
+    @contextlib.contextmanager
+    def _verrouiller(self):
+        """
+        Prend le verrou du stockage
+        
+        L'appel explicite à acquire() rend l'attente du verrou visible dans les
+        profils (voir profilage.py), ce que ne permet pas "with self.verrou".
+        """
+        self.verrou.acquire()
+        try:
+            yield
+        finally:
+            self.verrou.release()
+    
+    def ajouter_observateur(self, observateur):
+        """
+        Enregistre une fonction appelée après chaque livraison
+        
+        Args:
+            observateur: Fonction (adresse, nb_messages) ; nb_messages vaut None sans index
+        """
+        self.observateurs.append(observateur)
+    
+    def _initialiser_journal(self):
+        """Crée le journal avec une livraison par message existant (état initial des répliques)"""
+        nb_messages = 0
+        chemin_temporaire = self.journal_modifications + '.tmp'
+        with open(chemin_temporaire, 'w', encoding='utf-8') as f:
+            for adresse in self.lister_adresses():
+                boite_mail = self._lire_boite_mail(self._chemin_boite_mail(adresse)) or {}
+                for id_msg, message in boite_mail.items():
+                    expediteur, _, lignes = self.analyser_message(message['contenu'])
+                    f.write(json.dumps({"type": "livraison", "expediteur": expediteur,
+                                        "destinataire": adresse, "contenu": lignes,
+                                        "nb_messages": id_msg}, ensure_ascii=False) + "\n")
+                    nb_messages += 1
+        os.replace(chemin_temporaire, self.journal_modifications)
+        if nb_messages:
+            print(f"[Stockage] Journal des modifications initialisé avec {nb_messages} message(s) existant(s)")
+    
+    def _ouvrir_journal(self):
+        """Calcule la taille du journal, en retirant une éventuelle ligne incomplète"""
+        if not os.path.exists(self.journal_modifications):
+            return
+        with open(self.journal_modifications, 'rb+') as f:
+            # Recherche du dernier saut de ligne en remontant depuis la fin (sans tout lire)
+            taille = f.seek(0, os.SEEK_END)
+            fin = 0
+            position = taille
+            while position > 0:
+                debut = max(0, position - TAILLE_LECTURE_JOURNAL)
+                f.seek(debut)
+                dernier = f.read(position - debut).rfind(b"\n")
+                if dernier != -1:
+                    fin = debut + dernier + 1
+                    break
+                position = debut
+            if fin != taille:
+                print("[Stockage] Ligne incomplète retirée de la fin du journal des modifications")
+                f.truncate(fin)
+        self.taille_journal = fin
+    
+    def _journaliser(self, entree):
+        """Ajoute une modification au journal et réveille les lecteurs (verrou détenu)"""
+        if self.journal_modifications is None:
+            return
+        ligne = (json.dumps(entree, ensure_ascii=False) + "\n").encode('utf-8')
+        with open(self.journal_modifications, 'ab') as f:
+            f.write(ligne)
+        self.taille_journal += len(ligne)
+        self.nouvelle_modification.notify_all()
+    
+    def lire_journal(self, offset):
+        """
+        Lit le journal des modifications à partir d'un offset
+        
+        Returns:
+            bytes: Lignes complètes suivant l'offset (vide si aucune nouveauté)
+        """
+        taille_journal = self.taille_journal
+        fin = min(taille_journal, offset + TAILLE_LECTURE_JOURNAL)
+        if self.journal_modifications is None or offset >= fin:
+            return b""
+        with open(self.journal_modifications, 'rb') as f:
+            f.seek(offset)
+            donnees = f.read(fin - offset)
+            # Ligne plus longue que la fenêtre de lecture : lue jusqu'à son saut de ligne
+            # (taille_journal s'arrête toujours sur une fin de ligne)
+            while b"\n" not in donnees and offset + len(donnees) < taille_journal:
+                donnees += f.read(min(TAILLE_LECTURE_JOURNAL, taille_journal - offset - len(donnees)))
+        # Ne renvoie que des lignes complètes
+        return donnees[:donnees.rfind(b"\n") + 1]
+    
+    def attendre_modification(self, offset, delai):
+        """
+        Attend que le journal dépasse l'offset donné (au plus delai secondes)
+        
+        Returns:
+            int: Taille actuelle du journal
+        """
+        with self.nouvelle_modification:
+            self.nouvelle_modification.wait_for(lambda: self.taille_journal > offset, delai)
+            return self.taille_journal
+    
+    def appliquer_modification(self, entree, verifier_doublon=False):
+        """
+        Rejoue une modification lue dans le journal d'un autre stockage
+        
+        Args:
+            entree (dict): Ligne du journal décodée
+            verifier_doublon (bool): Ignore la modification si la boîte montre qu'elle
+                est déjà appliquée (première entrée rejouée après une reprise)
+        
+        Returns:
+            bool: True si la modification a été appliquée (ou l'était déjà)
+        """
+        if verifier_doublon and 'nb_messages' in entree:
+            livraison = entree.get('type') == 'livraison'
+            adresse = entree['destinataire'] if livraison else entree['adresse']
+            with self._verrouiller():
+                nb_actuel = self._compter_messages(self._chemin_boite_mail(adresse))
+            if (nb_actuel >= entree['nb_messages']) if livraison else (nb_actuel <= entree['nb_messages']):
+                print(f"[Stockage] Modification déjà appliquée pour {adresse}, ignorée")
+                return True
+        
+        match entree.get('type'):
+            case 'livraison':
+                return self.sauvegarder_message(entree['expediteur'], entree['destinataire'],
+                                                entree['contenu'])
+            case 'suppression':
+                return self.supprimer_message(entree['adresse'], entree['id'])
+            case _:
+                print(f"[Stockage] Modification inconnue ignorée: {entree}")
+                return False
+    
+    def _chemin_dans_racine(self, racine, adresse_mail):
+        """Retourne le chemin réparti d'une adresse dans une racine donnée"""
+        empreinte = hashlib.sha1(adresse_mail.encode('utf-8')).hexdigest()
+        sous_dossiers = [empreinte[2 * i:2 * i + 2] for i in range(self.niveaux_repartition)]
+        return os.path.join(racine, *sous_dossiers, f"{adresse_mail}.txt")
+    
+    def _chemin_attendu(self, adresse_mail):
+        """Retourne l'emplacement attendu d'une boîte selon la configuration actuelle"""
+        # Hachage de rendez-vous : la racine de score maximal l'emporte
+        racine = max(self.racines, key=lambda r: hashlib.sha1(f"{r}:{adresse_mail}".encode('utf-8')).digest())
+        return self._chemin_dans_racine(racine, adresse_mail)
     
     def _chemin_boite_mail(self, adresse_mail):
-        """Retourne le chemin du fichier pour une adresse mail"""
-        return os.path.join(self.dossier_mail, f"{adresse_mail}.txt")
+        """
+        Retourne le chemin du fichier pour une adresse mail
+        
+        Si la boîte n'est pas à son emplacement attendu (ancien fichier plat, y compris
+        dans dossier_mail, ou configuration modifiée avant rééquilibrage),
+        l'emplacement existant est retourné.
+        """
+        chemin = self._chemin_attendu(adresse_mail)
+        if os.path.exists(chemin):
+            return chemin
+        
+        for racine in dict.fromkeys(self.racines + [self.dossier_mail]):
+            for ancien in (self._chemin_dans_racine(racine, adresse_mail),
+                           os.path.join(racine, f"{adresse_mail}.txt")):
+                if os.path.exists(ancien):
+                    return ancien
+        return chemin
+    
+    def _formater_message(self, expediteur, destinataire, contenu_message):
+        """Construit le bloc texte d'un message tel qu'il est écrit sur disque"""
+        corps = '\n'.join(contenu_message)
+        entete = f"De: {expediteur}\nPour: {destinataire}\n"
+        donnees = corps.encode('utf-8')
+        
+        if self.compression and len(donnees) >= self.seuil_compression:
+            compresser = ALGORITHMES_COMPRESSION[self.compression][0]
+            encode = base64.b64encode(compresser(donnees)).decode('ascii')
+            lignes = [encode[i:i + LARGEUR_BASE64] for i in range(0, len(encode), LARGEUR_BASE64)]
+            entete += f"Compression: {self.compression}\n"
+            corps = '\n'.join(lignes)
+        
+        return f"{entete}Message:\n{corps}\n{SEPARATEUR}\n\n"
+    
+    def _decompresser_bloc(self, message):
+        """
+        Retourne le bloc d'un message avec son corps en clair
+        
+        Le bloc reconstruit est identique à celui qu'aurait produit un stockage
+        sans compression, ce qui garde les tailles annoncées par STAT/LIST stables.
+        """
+        tete, sep, corps = message.partition("Message:\n")
+        if not sep:
+            return message
+        
+        lignes_tete = tete.split('\n')
+        algorithme = None
+        for ligne in lignes_tete:
+            if ligne.startswith('Compression:'):
+                algorithme = ligne.replace('Compression:', '').strip()
+                break
+        
+        if algorithme is None:
+            return message
+        
+        decompresser = ALGORITHMES_COMPRESSION[algorithme][1]
+        texte = decompresser(base64.b64decode(''.join(corps.split()))).decode('utf-8')
+        tete = '\n'.join(ligne for ligne in lignes_tete if not ligne.startswith('Compression:'))
+        return f"{tete}Message:\n{texte}\n"
+    
+    def _bloc_illisible(self, message, erreur):
+        """Remplace le corps d'un bloc impossible à décompresser par un avis (en-têtes conservés)"""
+        tete = message.partition("Message:\n")[0]
+        tete = '\n'.join(ligne for ligne in tete.split('\n') if not ligne.startswith('Compression:'))
+        return f"{tete}Message:\n[Message illisible : corps compressé corrompu ({type(erreur).__name__})]\n"
     
     def sauvegarder_message(self, expediteur, destinataire, contenu_message):
         """
@@ -40,20 +341,85 @@ class StockageMessage:
         if destinataire is None or expediteur is None:
             return False
         
-        with self.verrou:  # Protection contre les accès simultanés
+        with self._verrouiller():  # Protection contre les accès simultanés
             chemin = self._chemin_boite_mail(destinataire)
             try:
+                bloc = self._formater_message(expediteur, destinataire, contenu_message)
+                os.makedirs(os.path.dirname(chemin), exist_ok=True)
                 with open(chemin, 'a', encoding='utf-8') as f:
-                    f.write(f"De: {expediteur}\n")
-                    f.write(f"Pour: {destinataire}\n")
-                    f.write("Message:\n")
-                    f.write('\n'.join(contenu_message))
-                    f.write("\n" + "="*50 + "\n\n")
+                    f.write(bloc)
+                
+                # Mise à jour incrémentale de l'index de recherche
+                if self.index is not None:
+                    id_msg = self.index.prochain_id(destinataire)
+                    termes = extraire_termes(expediteur, destinataire, contenu_message)
+                    self.index.ajouter(destinataire, id_msg, termes)
+                
+                nb_messages = self.index.nombre_messages.get(destinataire) if self.index is not None else None
+                if self.journal_modifications is not None:
+                    self._journaliser({"type": "livraison", "expediteur": expediteur,
+                                       "destinataire": destinataire, "contenu": list(contenu_message),
+                                       "nb_messages": nb_messages or self._compter_messages(chemin)})
                 print(f"[Stockage] Message enregistré pour {destinataire}")
-                return True
             except Exception as e:
                 print(f"[Stockage] Erreur lors de la sauvegarde: {e}")
                 return False
+        
+        # Notifie les observateurs hors du verrou : un abonné lent ne bloque pas le stockage
+        for observateur in list(self.observateurs):
+            try:
+                observateur(destinataire, nb_messages)
+            except Exception as e:
+                print(f"[Stockage] Erreur d'un observateur: {e}")
+        return True
+    
+    def supprimer_message(self, adresse_mail, id_msg):
+        """
+        Supprime un message d'une boîte mail (les messages suivants sont renumérotés)
+        
+        Args:
+            adresse_mail (str): Adresse de la boîte
+            id_msg (int): Identifiant du message à supprimer
+            
+        Returns:
+            bool: True si le message a été supprimé
+        """
+        with self._verrouiller():
+            chemin = self._chemin_boite_mail(adresse_mail)
+            if not os.path.exists(chemin):
+                return False
+            
+            try:
+                with open(chemin, 'r', encoding='utf-8') as f:
+                    blocs = f.read().split(SEPARATEUR)
+                
+                # Le dernier élément du découpage suit le dernier séparateur
+                if not 1 <= id_msg < len(blocs):
+                    return False
+                del blocs[id_msg - 1]
+                if id_msg == 1 and len(blocs) > 1:
+                    # Le premier message n'est pas précédé des sauts de ligne du séparateur
+                    blocs[0] = blocs[0].lstrip('\n')
+                
+                chemin_temporaire = chemin + '.tmp'
+                with open(chemin_temporaire, 'w', encoding='utf-8') as f:
+                    f.write(SEPARATEUR.join(blocs) if len(blocs) > 1 else "")
+                os.replace(chemin_temporaire, chemin)
+                
+                # Les ID suivants sont décalés : l'adresse est réindexée
+                if self.index is not None:
+                    boite_mail = self._lire_boite_mail(chemin) or {}
+                    self.index.reindexer(adresse_mail, (
+                        (id_restant, extraire_termes(*self.analyser_message(message['contenu'])))
+                        for id_restant, message in boite_mail.items()))
+                
+                self._journaliser({"type": "suppression", "adresse": adresse_mail, "id": id_msg,
+                                   "nb_messages": len(blocs) - 1})
+                print(f"[Stockage] Message {id_msg} supprimé pour {adresse_mail}")
+                return True
+            except Exception as e:
+                print(f"[Stockage] Erreur lors de la suppression: {e}")
+                return False
     
     def charger_boite_mail(self, adresse_mail):
         """
@@ -70,39 +436,175 @@ class StockageMessage:
         if not os.path.exists(chemin):
             return None
         
-        with self.verrou:  # Protection contre les accès simultanés
-            boite_mail = {}
-            try:
-                with open(chemin, 'r', encoding='utf-8') as f:
-                    contenu_complet = f.read()
+        with self._verrouiller():  # Protection contre les accès simultanés
+            return self._lire_boite_mail(chemin)
+    
+    def _compter_messages(self, chemin):
+        """Compte les messages d'un fichier de boîte mail (l'appelant détient le verrou)"""
+        if not os.path.exists(chemin):
+            return 0
+        with open(chemin, 'r', encoding='utf-8') as f:
+            return f.read().count(SEPARATEUR)
+    
+    def _lire_boite_mail(self, chemin):
+        """Lit et découpe un fichier de boîte mail (l'appelant détient le verrou)"""
+        boite_mail = {}
+        try:
+            with open(chemin, 'r', encoding='utf-8') as f:
+                contenu_complet = f.read()
+            
+            # Sépare les messages par le délimiteur
+            messages = contenu_complet.split(SEPARATEUR)
+            
+            id_mail = 1
+            # Traite tous les messages sauf le dernier (vide après split)
+            for message in messages[:-1]:
+                try:
+                    message = self._decompresser_bloc(message)
+                except ERREURS_DECOMPRESSION as e:
+                    print(f"[Stockage] Message {id_mail} illisible dans {chemin}: {e!r}")
+                    message = self._bloc_illisible(message, e)
+                taille = len(message.encode('utf-8'))
+                message_nettoye = message.strip()
                 
-                # Sépare les messages par le délimiteur
-                messages = contenu_complet.split("="*50)
+                # Extrait l'expéditeur
+                expediteur = "Inconnu"
+                for ligne in message_nettoye.split('\n'):
+                    if ligne.startswith('De:'):
+                        expediteur = ligne.replace('De:', '').strip()
+                        break
                 
-                id_mail = 1
-                # Traite tous les messages sauf le dernier (vide après split)
-                for message in messages[:-1]:
-                    taille = len(message.encode('utf-8'))
-                    message_nettoye = message.strip()
-                    
-                    # Extrait l'expéditeur
-                    expediteur = "Inconnu"
-                    for ligne in message_nettoye.split('\n'):
-                        if ligne.startswith('De:'):
-                            expediteur = ligne.replace('De:', '').strip()
-                            break
-                    
-                    boite_mail[id_mail] = {
-                        "expediteur": expediteur,
-                        "contenu": message_nettoye,
-                        "taille": taille
-                    }
-                    id_mail += 1
+                boite_mail[id_mail] = {
+                    "expediteur": expediteur,
+                    "contenu": message_nettoye,
+                    "taille": taille
+                }
+                id_mail += 1
+            
+            return boite_mail
+        except Exception as e:
+            print(f"[Stockage] Erreur lors du chargement: {e}")
+            return None
+    
+    def analyser_message(self, contenu):
+        """
+        Découpe le contenu d'un message chargé en ses champs
+        
+        Returns:
+            tuple: (expediteur, destinataire, liste des lignes du corps)
+        """
+        tete, _, corps = contenu.partition("Message:\n")
+        expediteur = destinataire = "Inconnu"
+        for ligne in tete.split('\n'):
+            if ligne.startswith('De:'):
+                expediteur = ligne.replace('De:', '').strip()
+            elif ligne.startswith('Pour:'):
+                destinataire = ligne.replace('Pour:', '').strip()
+        return expediteur, destinataire, corps.split('\n')
+    
+    def lister_boites(self, racines_supplementaires=()):
+        """
+        Parcourt toutes les racines et dossier_mail à la recherche des fichiers de boîte mail
+        
+        Args:
+            racines_supplementaires (list): Autres dossiers à parcourir (ex. racine retirée)
+            
+        Returns:
+            list: Tuples (adresse, chemin) triés par adresse
+        """
+        boites = set()
+        for racine in dict.fromkeys(self.racines + [self.dossier_mail] + list(racines_supplementaires)):
+            for dossier, _, fichiers in os.walk(racine):
+                # Chemins absolus : une racine placée dans dossier_mail n'est comptée qu'une fois
+                boites.update((nom[:-len('.txt')], os.path.abspath(os.path.join(dossier, nom)))
+                              for nom in fichiers if nom.endswith('.txt'))
+        return sorted(boites)
+    
+    def lister_adresses(self):
+        """Retourne la liste des adresses possédant une boîte mail"""
+        return sorted({adresse for adresse, _ in self.lister_boites()})
+    
+    def reequilibrer(self, anciennes_racines=()):
+        """
+        Déplace chaque boîte mail vers son emplacement attendu
+        (après passage à la répartition ou modification des racines)
+        
+        Args:
+            anciennes_racines (list): Racines retirées de la configuration à vider
+            
+        Returns:
+            int: Nombre de boîtes déplacées
+        """
+        deplacees = 0
+        fusions = False
+        with self._verrouiller():
+            for adresse, chemin in self.lister_boites(anciennes_racines):
+                attendu = self._chemin_attendu(adresse)
+                if os.path.abspath(chemin) == os.path.abspath(attendu):
+                    continue
                 
-                return boite_mail
-            except Exception as e:
-                print(f"[Stockage] Erreur lors du chargement: {e}")
-                return None
+                os.makedirs(os.path.dirname(attendu), exist_ok=True)
+                if os.path.exists(attendu):
+                    # Boîte présente à deux endroits : les messages sont regroupés
+                    print(f"[Stockage] Fusion de {chemin} dans {attendu}")
+                    with open(chemin, 'r', encoding='utf-8') as source, \
+                         open(attendu, 'a', encoding='utf-8') as cible:
+                        shutil.copyfileobj(source, cible)
+                    os.remove(chemin)
+                    fusions = True
+                else:
+                    shutil.move(chemin, attendu)
+                deplacees += 1
+        
+        print(f"[Stockage] Rééquilibrage terminé : {deplacees} boîte(s) déplacée(s)")
+        # Une fusion change la numérotation des messages
+        if fusions:
+            self.reconstruire_index()
+        return deplacees
+    
+    def reconstruire_index(self):
+        """Reconstruit l'index de recherche à partir de toutes les boîtes mail"""
+        if self.index is None:
+            return
+        
+        with self._verrouiller():
+            def entrees():
+                for adresse in self.lister_adresses():
+                    boite_mail = self._lire_boite_mail(self._chemin_boite_mail(adresse)) or {}
+                    for id_msg, message in boite_mail.items():
+                        expediteur, destinataire, lignes = self.analyser_message(message['contenu'])
+                        yield adresse, id_msg, extraire_termes(expediteur, destinataire, lignes)
+            
+            self.index.enregistrer(entrees())
+        print("[Stockage] Index de recherche reconstruit")
+    
+    def rechercher(self, adresse_mail, termes):
+        """
+        Recherche les messages d'une boîte contenant tous les termes
+        
+        Args:
+            adresse_mail (str): Boîte mail à interroger
+            termes (list): Mots du corps, "de:<adresse>" ou "pour:<adresse>"
+            
+        Returns:
+            list: Identifiants des messages trouvés, ou None si la boîte est inexistante
+        """
+        if not os.path.exists(self._chemin_boite_mail(adresse_mail)):
+            return None
+        
+        if self.index is not None:
+            with self._verrouiller():
+                return self.index.rechercher(adresse_mail, termes)
+        
+        # Sans index : parcours complet de la boîte mail
+        boite_mail = self.charger_boite_mail(adresse_mail) or {}
+        requete = set(normaliser_requete(termes))
+        resultat = []
+        for id_msg, message in boite_mail.items():
+            termes_message = extraire_termes(*self.analyser_message(message['contenu']))
+            if requete and requete <= termes_message:
+                resultat.append(id_msg)
+        return resultat
     
     def obtenir_nombre_messages(self, boite_mail):
         """Retourne le nombre de messages"""